@@ -0,0 +1,69 @@
+"""
+Scheme Passage Index Benchmark
+------------------------------
+Times a cold build of the passage index over the bundled scheme PDFs, a load
+from disk, and query latency.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_scheme_passages
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from backend.tools.scheme_passages import PDF_DIR, PassageIndex, build_passage_index
+
+QUERIES = [
+    "how to apply for pm-kisan",
+    "documents required for crop insurance claim",
+    "premium rate for kharif crops under PMFBY",
+    "who is eligible for pension under PM-KMY",
+    "rythu bandhu investment support per acre",
+    "interest subvention on agriculture infrastructure fund loans",
+    "seed distribution under national food security mission",
+    "cut-off date for enrolment of loanee farmers",
+    "what happens if the farmer dies before 60",
+    "grievance redressal committee at district level",
+]
+QUERY_REPEATS = 200
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    start = time.perf_counter()
+    index = build_passage_index(PDF_DIR)
+    build_s = time.perf_counter() - start
+    print(f"Build: {build_s:.2f}s for {len(index.sources)} PDFs, {len(index)} passages, "
+          f"{len(index.bm25.postings)} terms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "scheme_passages.json"
+        index.save(path)
+        start = time.perf_counter()
+        index = PassageIndex.load(path)
+        print(f"Load from disk: {(time.perf_counter() - start) * 1000:.1f}ms "
+              f"({path.stat().st_size / 1e6:.1f} MB)")
+
+    latencies = []
+    for _ in range(QUERY_REPEATS):
+        for query in QUERIES:
+            start = time.perf_counter()
+            index.search(query, top_k=6)
+            latencies.append((time.perf_counter() - start) * 1000)
+    print(f"Query ({len(latencies)} runs): p50 {statistics.median(latencies):.3f}ms, "
+          f"p95 {percentile(latencies, 95):.3f}ms, max {max(latencies):.3f}ms")
+
+    for query in QUERIES[:3]:
+        top = index.search(query, top_k=1)
+        if top:
+            print(f"  '{query}' -> {top[0]['source_file']} p.{top[0]['page_start']}-{top[0]['page_end']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Scheme Vector Search Benchmark
+------------------------------
+Recall and latency of BM25, vector (hashing TF-IDF + LSA) and fused passage
+retrieval against the labelled questions in ``scheme_questions.json``.
+A question counts as recalled@k when any of the top k passages comes from
+one of its expected source PDFs.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_scheme_vectors
+"""
+
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from backend.tools.scheme_passages import get_passage_index
+from backend.tools.scheme_vectors import VectorIndex, reciprocal_rank_fusion
+
+QUESTIONS_PATH = Path(__file__).parent / "scheme_questions.json"
+KS = (1, 3, 5)
+LATENCY_REPEATS = 50
+
+
+def recall(search, questions, passages, k):
+    hits = 0
+    for item in questions:
+        top = search(item["question"], k)
+        hits += any(passages[pid]["source_file"] in item["sources"] for pid, _ in top)
+    return hits / len(questions)
+
+
+def timed(fn, repeats):
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    with open(QUESTIONS_PATH, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    passage_index = get_passage_index()
+    passages = passage_index.passages
+
+    start = time.perf_counter()
+    vectors = VectorIndex.build([p["text"] for p in passages])
+    print(f"Build: {time.perf_counter() - start:.2f}s for {len(vectors)} passages, "
+          f"{vectors.embeddings.shape[1]} dims")
+    with tempfile.TemporaryDirectory() as tmp:
+        vectors.save(Path(tmp))
+        start = time.perf_counter()
+        vectors = VectorIndex.load(Path(tmp))
+        print(f"Load (mmap): {(time.perf_counter() - start) * 1000:.1f}ms")
+
+        methods = {
+            "bm25": lambda q, k: passage_index.search_ids(q, k),
+            "vector": lambda q, k: vectors.search(q, k),
+            "hybrid": lambda q, k: reciprocal_rank_fusion(
+                [passage_index.search_ids(q, k * 2), vectors.search(q, k * 2)], k),
+        }
+        print(f"\nRecall over {len(questions)} labelled questions")
+        for name, search in methods.items():
+            scores = ", ".join(f"@{k} {recall(search, questions, passages, k):.2f}" for k in KS)
+            ms = statistics.median(
+                timed(lambda: search(item["question"], 5), LATENCY_REPEATS) for item in questions
+            )
+            print(f"  {name:<7} {scores}   p50 {ms:.3f}ms/query")
+
+        texts = [item["question"] for item in questions]
+        batch_ms = timed(lambda: vectors.search_many(texts, 5), LATENCY_REPEATS)
+        print(f"\nBatched vector search: {batch_ms:.2f}ms for {len(texts)} queries "
+              f"({batch_ms / len(texts):.3f}ms/query)")
+
+
+if __name__ == "__main__":
+    main()
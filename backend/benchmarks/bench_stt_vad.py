@@ -0,0 +1,101 @@
+"""
+STT Chunking Benchmark
+----------------------
+Blind fixed 29s slicing vs energy-based VAD chunking for a long voice note.
+
+The voice note is synthesized from the bundled ``debug_chunk_*.wav`` speech
+fixtures: utterances separated by short in-sentence gaps, longer pauses and
+the odd stretch of dead air, over low background noise. Because the speech
+positions are known, the benchmark reports STT calls, seconds uploaded,
+chunk boundaries that fall inside an utterance (split words) and how much of
+the speech the VAD kept, plus VAD CPU time per minute of audio.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_stt_vad [fixture.wav ...]
+"""
+
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from backend.tools.audio_utils import vad_spans
+from backend.tools.tts_stt_tool import STT_MAX_CHUNK_MS, TARGET_SAMPLE_RATE
+
+ROOT = Path(__file__).resolve().parents[2]
+MINUTES = 4
+NOISE_STD = 30  # int16 scale, a quiet room
+FIXTURE_TRIM_LEVEL = 500
+RANDOM_SEED = 7
+REPEATS = 20
+
+
+def load_fixture(path: Path) -> np.ndarray:
+    with wave.open(str(path), "rb") as w:
+        if w.getsampwidth() != 2 or w.getframerate() != TARGET_SAMPLE_RATE:
+            raise ValueError(f"{path.name}: expected 16-bit {TARGET_SAMPLE_RATE} Hz audio")
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype=np.int16)
+        samples = samples.reshape(-1, w.getnchannels()).mean(axis=1).astype(np.int16)
+    # Trim the fixture's own leading/trailing silence so the ground-truth mask is speech only
+    audible = np.flatnonzero(np.abs(samples) > FIXTURE_TRIM_LEVEL)
+    return samples[audible[0]:audible[-1] + 1] if len(audible) else samples
+
+
+def voice_note(fixtures, minutes, rng):
+    """(samples, ground-truth speech mask) for a synthetic voice note"""
+    parts, mask = [], []
+    total = minutes * 60 * TARGET_SAMPLE_RATE
+    length = 0
+    while length < total:
+        gap_s = rng.choice([rng.uniform(0.05, 0.25), rng.uniform(0.6, 2.5), rng.uniform(6, 10)], p=[0.6, 0.35, 0.05])
+        gap = int(gap_s * TARGET_SAMPLE_RATE)
+        speech = fixtures[rng.integers(len(fixtures))]
+        parts += [np.zeros(gap, dtype=np.float32), speech.astype(np.float32)]
+        mask += [np.zeros(gap, dtype=bool), np.ones(len(speech), dtype=bool)]
+        length += gap + len(speech)
+    samples = np.concatenate(parts) + rng.normal(0, NOISE_STD, length)
+    return np.clip(samples, -32768, 32767).astype(np.int16), np.concatenate(mask)
+
+
+def report(name, chunks, mask, seconds, elapsed_ms=None):
+    uploaded = sum(end - start for chunk in chunks for start, end in chunk) / TARGET_SAMPLE_RATE
+    cuts = [chunk[-1][1] for chunk in chunks[:-1]]
+    split_words = sum(1 for cut in cuts if 0 < cut < len(mask) and mask[cut - 1] and mask[cut])
+    kept = np.zeros(len(mask), dtype=bool)
+    for chunk in chunks:
+        for start, end in chunk:
+            kept[start:end] = True
+    recall = (kept & mask).sum() / mask.sum()
+    line = (f"{name:<6} calls={len(chunks):>3}  uploaded={uploaded:7.1f}s ({uploaded / seconds:5.1%})  "
+            f"split utterances={split_words:>2}  speech kept={recall:6.1%}")
+    if elapsed_ms is not None:
+        line += f"  VAD cpu={elapsed_ms:6.2f} ms ({elapsed_ms / (seconds / 60):.2f} ms per audio minute)"
+    print(line)
+
+
+def main(paths):
+    fixtures = [load_fixture(p) for p in paths]
+    rng = np.random.default_rng(RANDOM_SEED)
+    samples, mask = voice_note(fixtures, MINUTES, rng)
+    seconds = len(samples) / TARGET_SAMPLE_RATE
+    print(f"Voice note: {seconds:.1f}s from {len(fixtures)} fixture(s), {mask.mean():.1%} speech\n")
+
+    step = STT_MAX_CHUNK_MS * TARGET_SAMPLE_RATE // 1000
+    blind = [[(start, min(start + step, len(samples)))] for start in range(0, len(samples), step)]
+    report("blind", blind, mask, seconds)
+
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        chunks = vad_spans(samples, TARGET_SAMPLE_RATE, STT_MAX_CHUNK_MS)
+        timings.append((time.perf_counter() - start) * 1000)
+    report("vad", chunks, mask, seconds, float(np.median(timings)))
+
+
+if __name__ == "__main__":
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(ROOT.glob("debug_chunk_*.wav"))
+    if not paths:
+        sys.exit("No debug_chunk_*.wav fixtures found; pass WAV paths as arguments")
+    main(paths)
@@ -0,0 +1,73 @@
+"""
+TTS Delivery Format Benchmark
+-----------------------------
+Payload size and encode cost of each /tts delivery format for the same
+speech: base64 WAV in JSON (default), raw WAV, Opus/Ogg and MP3.
+
+The speech is the bundled ``debug_chunk_*.wav`` fixtures looped to about a
+minute. Encode cost is ffmpeg CPU time (user + sys of the child processes)
+per second of speech; formats whose encoder is unavailable are reported and
+skipped.
+
+Run from the project root:
+    python -m backend.benchmarks.bench_tts_formats [fixture.wav ...]
+"""
+
+import base64
+import json
+import resource
+import sys
+import time
+from pathlib import Path
+
+from backend.tools.audio_encoding import ENCODER_ARGS, AudioEncodingError, encode_audio
+from backend.tools.audio_utils import pcm_to_wav, wav_to_pcm16
+
+ROOT = Path(__file__).resolve().parents[2]
+SAMPLE_RATE = 16000
+TARGET_SECONDS = 60
+REPEATS = 5
+
+
+def speech_wav(paths):
+    pieces = [wav_to_pcm16(p.read_bytes(), SAMPLE_RATE) for p in paths]
+    loop_seconds = sum(len(piece) for piece in pieces) / (SAMPLE_RATE * 2)
+    repeats = max(1, round(TARGET_SECONDS / loop_seconds))
+    wav = pcm_to_wav(pieces * repeats, SAMPLE_RATE, 1, 2)
+    return wav, (len(wav) - 44) / (SAMPLE_RATE * 2)
+
+
+def child_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main(paths):
+    wav, seconds = speech_wav(paths)
+    print(f"Speech: {seconds:.1f}s from {len(paths)} fixture(s)\n")
+    print(f"{'format':<6} {'payload':>10} {'per speech s':>13} {'vs json':>8} {'encode cpu/s':>13} {'wall/s':>9}")
+
+    json_size = len(json.dumps({"audio": base64.b64encode(wav).decode("ascii"), "translated_text": None}))
+    print(f"{'json':<6} {json_size:>10,} {json_size / seconds:>12,.0f}B {1:>8.0%} {'-':>13} {'-':>9}")
+    print(f"{'wav':<6} {len(wav):>10,} {len(wav) / seconds:>12,.0f}B {len(wav) / json_size:>8.0%} {'-':>13} {'-':>9}")
+
+    for fmt in ENCODER_ARGS:
+        try:
+            cpu_before, wall_before = child_cpu_seconds(), time.perf_counter()
+            for _ in range(REPEATS):
+                encoded = encode_audio(wav, fmt)
+            cpu = (child_cpu_seconds() - cpu_before) / REPEATS
+            wall = (time.perf_counter() - wall_before) / REPEATS
+        except AudioEncodingError as e:
+            print(f"{fmt:<6} skipped: {e}")
+            continue
+        size = len(encoded)
+        print(f"{fmt:<6} {size:>10,} {size / seconds:>12,.0f}B {size / json_size:>8.1%} "
+              f"{cpu / seconds * 1000:>10.2f} ms {wall / seconds * 1000:>6.2f} ms")
+
+
+if __name__ == "__main__":
+    paths = [Path(p) for p in sys.argv[1:]] or sorted(ROOT.glob("debug_chunk_*.wav"))
+    if not paths:
+        sys.exit("No debug_chunk_*.wav fixtures found; pass WAV paths as arguments")
+    main(paths)
@@ -1,21 +1,36 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from io import BytesIO
 from dotenv import load_dotenv
 import os
 import base64
+import time
+from urllib.parse import quote
 
 # ─── Import tool stubs ──────────────────────────────────────────────────────────
-from backend.tools.crop_diagnosis_tool import diagnose_crop
-from backend.tools.market_advisory_tool import get_market_trend
-from backend.tools.scheme_navigator_tool import answer_scheme_query
-from backend.tools.tts_stt_tool import synthesize_speech, transcribe_audio
+from backend.tools.audio_encoding import (
+    MEDIA_TYPES, AudioEncodingError, encode_audio_async, negotiate_audio_format
+)
+from backend.tools.crop_diagnosis_tool import diagnose_crop, diagnose_crop_stream
+from backend.tools.image_preprocess import ImagePreprocessError, prepare_image_async
+from backend.tools.market_advisory_tool import (
+    NEAREST_MARKETS_K, get_market_trend_async, get_market_trends_batch, get_nearest_markets
+)
+from backend.tools.mandi_api_client import get_mandi_client
+from backend.tools.mandi_sync import start_background_sync
+from backend.tools.metrics import metrics_snapshot
+from backend.tools.scheme_navigator_tool import answer_scheme_query, answer_scheme_query_stream
+from backend.tools.tts_cache import get_tts_cache
+from backend.tools.tts_stt_tool import synthesize_speech, synthesize_speech_stream, transcribe_audio
 
 # ─── Import Firestore and Auth services ─────────────────────────────────────────
 from backend.firestore_service import firestore_service
 from backend.auth_middleware import get_current_user
+from backend.streaming import stream_audio, stream_text
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,8 +49,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Translated-Text"],  # read by the frontend on binary /tts responses
 )
 
+@app.on_event("startup")
+async def start_background_jobs():
+    # Periodic mandi price ingestion (enabled by MANDI_SYNC_INTERVAL_S)
+    app.state.mandi_sync_task = start_background_sync()
+
+@app.on_event("shutdown")
+async def close_upstream_clients():
+    sync_task = getattr(app.state, "mandi_sync_task", None)
+    if sync_task is not None:
+        sync_task.cancel()
+    await get_mandi_client().aclose()
+
 # Custom middleware to handle OPTIONS requests
 @app.middleware("http")
 async def handle_options_requests(request, call_next):
@@ -53,10 +81,21 @@ async def handle_options_requests(request, call_next):
     return await call_next(request)
 
 # ─── Pydantic request / response schemas ───────────────────────────────────────
-class MarketQuery(BaseModel):
+class MarketBatchItem(BaseModel):
     crop_name: str
     location: Optional[str] = None  # optional for now
 
+class MarketQuery(MarketBatchItem):
+    # Nearest-market lookup is single-query only; batch items don't take these
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    nearest: int = Field(NEAREST_MARKETS_K, ge=0, le=20)
+
+MAX_MARKET_BATCH_ITEMS = 50
+
+class MarketBatchQuery(BaseModel):
+    items: List[MarketBatchItem] = Field(..., max_length=MAX_MARKET_BATCH_ITEMS)
+
 class SubsidyQuery(BaseModel):
     question: str
 
@@ -94,6 +133,7 @@ async def get_tool_conversations(tool_name: str, user_id: str = Depends(get_curr
 async def diagnose_crop_endpoint(
     image: UploadFile = File(...), 
     query: str = "", 
+    stream: Optional[Literal["sse", "ndjson"]] = None,
     user_id: str = Depends(get_current_user)
 ):
     # Ensure the uploaded file is an image (JPEG or PNG)
@@ -103,15 +143,37 @@ async def diagnose_crop_endpoint(
     # Read the image bytes
     img_bytes = await image.read()
 
+    # Upright, downsized and re-encoded off the event loop; sent with its real MIME type
+    try:
+        prepared = await prepare_image_async(img_bytes)
+    except ImagePreprocessError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    image_sizes = {"image_size": len(img_bytes), "upload_size": len(prepared.data),
+                   "upload_mime_type": prepared.mime_type}
+
+    if stream:
+        def store_streamed_diagnosis(text, complete):
+            firestore_service.store_conversation(user_id, "crop_diagnosis", {
+                "query": query,
+                "image_filename": image.filename,
+                **image_sizes,
+                "response": {"diagnosis": text},
+                "stream_complete": complete,
+                "tool_type": "crop_diagnosis"
+            })
+
+        return stream_text(diagnose_crop_stream(prepared.data, query, API_KEY, prepared.mime_type), stream,
+                           "diagnose_crop", store_streamed_diagnosis)
+
     try:
         # Call the diagnose_crop function with image bytes and the query
-        diagnosis = diagnose_crop(img_bytes, query, API_KEY)
+        diagnosis = await run_in_threadpool(diagnose_crop, prepared.data, query, API_KEY, prepared.mime_type)
         
         # Store conversation metadata
         metadata = {
             "query": query,
             "image_filename": image.filename,
-            "image_size": len(img_bytes),
+            **image_sizes,
             "response": diagnosis,
             "tool_type": "crop_diagnosis"
         }
@@ -128,7 +190,13 @@ async def market_advice_endpoint(
     query: MarketQuery, 
     user_id: str = Depends(get_current_user)
 ):
-    result = get_market_trend(query.crop_name, query.location)
+    result = await get_market_trend_async(query.crop_name, query.location)
+    if query.nearest:
+        nearest = await run_in_threadpool(
+            get_nearest_markets, query.crop_name, query.location, query.latitude, query.longitude, query.nearest
+        )
+        if nearest is not None:
+            result = {**result, "nearest_markets": nearest}
     
     # Store conversation metadata
     metadata = {
@@ -142,12 +210,43 @@ async def market_advice_endpoint(
     
     return result
 
+@app.post("/market_advice/batch")
+async def market_advice_batch_endpoint(
+    query: MarketBatchQuery, 
+    user_id: str = Depends(get_current_user)
+):
+    results = await get_market_trends_batch([(item.crop_name, item.location) for item in query.items])
+    
+    # Store conversation metadata
+    metadata = {
+        "items": [item.model_dump() for item in query.items],
+        "response": results,
+        "tool_type": "market_advisory"
+    }
+    
+    firestore_service.store_conversation(user_id, "market_advisory", metadata)
+    
+    return {"results": results}
+
 # 3️⃣ Subsidy Navigator  ---------------------------------------------------------
 @app.post("/subsidy_query")
 async def subsidy_query_endpoint(
     query: SubsidyQuery, 
+    stream: Optional[Literal["sse", "ndjson"]] = None,
     user_id: str = Depends(get_current_user)
 ):
+    if stream:
+        def store_streamed_answer(text, complete):
+            firestore_service.store_conversation(user_id, "subsidy_navigator", {
+                "question": query.question,
+                "response": text,
+                "stream_complete": complete,
+                "tool_type": "subsidy_navigator"
+            })
+
+        return stream_text(answer_scheme_query_stream(query.question), stream,
+                           "subsidy_query", store_streamed_answer)
+
     answer = answer_scheme_query(query.question)
     
     # Store conversation metadata
@@ -165,16 +264,58 @@ async def subsidy_query_endpoint(
 @app.post("/tts")
 async def tts_endpoint(
     req: TTSRequest, 
+    stream: bool = False,
+    format: Optional[Literal["json", "wav", "ogg", "mp3"]] = None,
+    accept: Optional[str] = Header(None),
     user_id: str = Depends(get_current_user)
 ):
-    result = synthesize_speech(
+    if stream:
+        # Progressive WAV: header first, then PCM per chunk as it is synthesized
+        start = time.perf_counter()
+        header, pcm_chunks, translated_text = await run_in_threadpool(
+            synthesize_speech_stream,
+            req.text,
+            req.language,
+            translate=req.translate,
+            source_lang=req.source_lang,
+            target_lang=req.target_lang
+        )
+
+        def store_streamed_tts(audio_length, complete):
+            firestore_service.store_conversation(user_id, "text_to_speech", {
+                "text": req.text,
+                "language": req.language,
+                "translate": req.translate,
+                "source_lang": req.source_lang,
+                "target_lang": req.target_lang,
+                "audio_length": audio_length,
+                "translated_text": translated_text,
+                "stream_complete": complete,
+                "tool_type": "text_to_speech"
+            })
+
+        # Translated text travels percent-encoded in a header since the body is audio
+        headers = {"X-Translated-Text": quote(translated_text)} if translated_text else None
+        return stream_audio(header, pcm_chunks, "tts", "audio/wav", store_streamed_tts,
+                            start=start, headers=headers)
+
+    # Blocking upstream calls run off the event loop
+    result = await run_in_threadpool(
+        synthesize_speech,
         req.text,
         req.language,
         translate=req.translate,
         source_lang=req.source_lang,
         target_lang=req.target_lang
     )
-    audio_base64 = base64.b64encode(result["audio"]).decode("utf-8")
+    # Binary audio (WAV/Opus/MP3) when asked for via ?format= or Accept; base64 WAV in JSON otherwise
+    audio_format = negotiate_audio_format(format, accept)
+    audio_body = None
+    if audio_format != "json" and result["audio"]:
+        try:
+            audio_body = await encode_audio_async(result["audio"], audio_format)
+        except AudioEncodingError as e:
+            print(f"⚠️ {e}; falling back to base64 WAV")
     
     # Store conversation metadata
     metadata = {
@@ -184,13 +325,21 @@ async def tts_endpoint(
         "source_lang": req.source_lang,
         "target_lang": req.target_lang,
         "audio_length": len(result["audio"]),
+        "audio_format": audio_format if audio_body is not None else "json",
         "translated_text": result.get("translated_text"),
         "tool_type": "text_to_speech"
     }
     
     firestore_service.store_conversation(user_id, "text_to_speech", metadata)
     
-    return {"audio": audio_base64, "translated_text": result["translated_text"]}
+    # The body depends on Accept, so caches must key on it
+    headers = {"Vary": "Accept"}
+    if audio_body is not None:
+        if result["translated_text"]:
+            headers["X-Translated-Text"] = quote(result["translated_text"])
+        return Response(content=audio_body, media_type=MEDIA_TYPES[audio_format], headers=headers)
+    audio_base64 = base64.b64encode(result["audio"]).decode("utf-8")
+    return JSONResponse({"audio": audio_base64, "translated_text": result["translated_text"]}, headers=headers)
 
 # 5️⃣ Speech‑to‑Text (stub) ------------------------------------------------------
 @app.post("/stt", response_model=STTResponse)
@@ -199,7 +348,7 @@ async def stt_endpoint(
     user_id: str = Depends(get_current_user)
 ):
     audio_bytes = await audio.read()
-    transcript = transcribe_audio(audio_bytes)
+    transcript = await run_in_threadpool(transcribe_audio, audio_bytes)
     
     # Store conversation metadata
     metadata = {
@@ -213,6 +362,15 @@ async def stt_endpoint(
     
     return {"transcript": transcript}
 
+# Debug endpoint exposing tool cache/latency counters
+@app.get("/debug/metrics")
+async def debug_metrics():
+    return {
+        "metrics": metrics_snapshot(),
+        "mandi_api": get_mandi_client().stats(),
+        "tts_cache": get_tts_cache().stats(),
+    }
+
 # Debug endpoint to check scheme processing
 @app.get("/debug/schemes")
 async def debug_schemes():
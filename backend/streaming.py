@@ -0,0 +1,111 @@
+"""
+Streaming Responses
+-------------------
+Opt-in incremental delivery of model text for slow (2G/3G) clients.
+
+``stream_text`` wraps a generator of text deltas in a StreamingResponse:
+  * ``sse``    -> ``data: {"delta": "..."}`` events, then ``data: {"done": true, ...}``
+  * ``ndjson`` -> one ``{"delta": "..."}`` JSON object per line, then ``{"done": true, ...}``
+
+The full text is handed to ``on_complete`` once the stream closes (including
+client disconnects, flagged as incomplete), so conversations are still
+persisted. Time to first chunk and total stream time are recorded separately
+in ``metrics`` (namespace ``streaming``).
+
+``stream_audio`` does the same for binary audio: the container header goes out
+immediately, then each audio chunk as it is produced (time to first audio is
+recorded as ``<name>.time_to_first_audio``).
+"""
+
+import json
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from fastapi.responses import StreamingResponse
+
+from backend.tools.metrics import get_metrics
+
+STREAM_MODES = ("sse", "ndjson")
+MEDIA_TYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+
+metrics = get_metrics("streaming")
+
+
+def _frame(mode: str, payload: dict) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"data: {data}\n\n" if mode == "sse" else f"{data}\n"
+
+
+def _frames(chunks: Iterable[str], mode: str, name: str,
+            on_complete: Callable[[str, bool], None]) -> Iterator[str]:
+    start = time.perf_counter()
+    parts = []
+    complete = False
+    try:
+        for text in chunks:
+            if not parts:
+                metrics.observe(f"{name}.time_to_first_chunk", time.perf_counter() - start)
+            parts.append(text)
+            yield _frame(mode, {"delta": text})
+        complete = True
+        yield _frame(mode, {"done": True, "text": "".join(parts)})
+    except Exception as e:
+        print(f"❌ Stream {name} failed: {e}")
+        metrics.incr(f"{name}.errors")
+        yield _frame(mode, {"done": True, "error": str(e), "text": "".join(parts)})
+    finally:
+        metrics.observe(f"{name}.total", time.perf_counter() - start)
+        try:
+            on_complete("".join(parts), complete)
+        except Exception as e:
+            print(f"⚠️ Could not persist streamed {name} response: {e}")
+
+
+def stream_text(chunks: Iterable[str], mode: str, name: str,
+                on_complete: Callable[[str, bool], None]) -> StreamingResponse:
+    """StreamingResponse of text deltas; ``on_complete(full_text, complete)`` runs after the stream closes"""
+    return StreamingResponse(
+        _frames(chunks, mode, name, on_complete),
+        media_type=MEDIA_TYPES[mode],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _audio_frames(header: bytes, chunks: Iterable[bytes], name: str, start: float,
+                  on_complete: Callable[[int, bool], None]) -> Iterator[bytes]:
+    sent = 0
+    complete = False
+    try:
+        yield header
+        for chunk in chunks:
+            if not sent:
+                metrics.observe(f"{name}.time_to_first_audio", time.perf_counter() - start)
+            sent += len(chunk)
+            yield chunk
+        complete = True
+    except Exception as e:
+        # Headers are already sent, so the stream just ends early
+        print(f"❌ Stream {name} failed: {e}")
+        metrics.incr(f"{name}.errors")
+    finally:
+        metrics.observe(f"{name}.total", time.perf_counter() - start)
+        try:
+            on_complete(sent, complete)
+        except Exception as e:
+            print(f"⚠️ Could not persist streamed {name} response: {e}")
+
+
+def stream_audio(header: bytes, chunks: Iterable[bytes], name: str, media_type: str,
+                 on_complete: Callable[[int, bool], None], start: Optional[float] = None,
+                 headers: Optional[dict] = None) -> StreamingResponse:
+    """StreamingResponse of ``header`` then each audio chunk; ``on_complete(bytes_sent, complete)`` runs at the end
+
+    ``start`` (a ``time.perf_counter()`` value) lets time-to-first-audio include work
+    done before the response was built, such as translation.
+    """
+    start = time.perf_counter() if start is None else start
+    return StreamingResponse(
+        _audio_frames(header, chunks, name, start, on_complete),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})},
+    )
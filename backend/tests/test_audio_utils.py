@@ -0,0 +1,37 @@
+"""Regression tests for voice activity detection on STT uploads."""
+
+import numpy as np
+import pytest
+
+from backend.tools.audio_utils import VAD_MIN_RMS, vad_chunks
+
+SAMPLE_RATE = 16000
+MAX_CHUNK_MS = 29000
+
+
+def speech_like(seconds, rms, seed=0):
+    """Noise bursts at ``rms`` with short pauses, roughly the rhythm of speech"""
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, rms, seconds * SAMPLE_RATE)
+    envelope = (np.arange(len(samples)) // (SAMPLE_RATE // 2)) % 4 != 3  # 1.5 s on, 0.5 s off
+    return np.clip(samples * envelope, -32768, 32767).astype(np.int16)
+
+
+def assert_chunk_bound(chunks):
+    assert chunks
+    assert all(len(chunk) <= SAMPLE_RATE * MAX_CHUNK_MS // 1000 for chunk in chunks)
+
+
+def test_quiet_recording_is_not_dropped():
+    samples = speech_like(40, rms=VAD_MIN_RMS * 0.75)
+    chunks = vad_chunks(samples, SAMPLE_RATE, MAX_CHUNK_MS)
+    assert_chunk_bound(chunks)
+    assert sum(len(chunk) for chunk in chunks) == len(samples)
+
+
+@pytest.mark.parametrize("seconds", [40, 95])
+def test_normal_recording_drops_pauses_within_chunk_bound(seconds):
+    samples = speech_like(seconds, rms=3000)
+    chunks = vad_chunks(samples, SAMPLE_RATE, MAX_CHUNK_MS)
+    assert_chunk_bound(chunks)
+    assert sum(len(chunk) for chunk in chunks) < len(samples)
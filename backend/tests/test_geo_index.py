@@ -0,0 +1,65 @@
+"""Regression tests for free-text location resolution in the mandi gazetteer."""
+
+import csv
+
+import pytest
+
+from backend.tools.geo_index import Gazetteer
+from backend.tools.price_store import PRICE_CSV_PATH, PriceStore
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer()
+
+
+@pytest.fixture(scope="module")
+def price_pairs():
+    with open(PRICE_CSV_PATH, "r", encoding="utf-8") as f:
+        return {(row["State"].strip(), row["District"].strip()) for row in csv.DictReader(f)}
+
+
+def state_centroid(gazetteer, state):
+    points = [i for i, s in enumerate(gazetteer.states) if s == state]
+    return (sum(gazetteer.grid.lats[i] for i in points) / len(points),
+            sum(gazetteer.grid.lons[i] for i in points) / len(points))
+
+
+@pytest.mark.parametrize("state", ["Karnataka", "Punjab", "Maharashtra", "Kerala"])
+def test_state_only_location_resolves_to_state_centroid(gazetteer, state):
+    lat, lon = gazetteer.locate(state)
+    expected = state_centroid(gazetteer, state)
+    assert lat == pytest.approx(expected[0])
+    assert lon == pytest.approx(expected[1])
+
+
+def test_state_name_never_lands_on_lookalike_district(gazetteer):
+    # "Karnataka" used to fuzzy-match Karnal, Haryana
+    assert gazetteer.locate("Karnataka") != gazetteer.locate("Karnal")
+
+
+def test_unknown_place_is_not_guessed(gazetteer):
+    # Unknown names used to fuzzy-match some district (e.g. Bangalore)
+    assert gazetteer.locate("Atlantis") is None
+
+
+def test_gazetteer_covers_every_state_and_district_in_price_data(gazetteer, price_pairs):
+    states = {state for state, _ in price_pairs}
+    assert all(gazetteer.locate(state) is not None for state in states)
+    missing = [f"{district}, {state}" for state, district in price_pairs
+               if gazetteer.locate(f"{district}, {state}") is None]
+    assert missing == []
+
+
+def test_every_price_row_gets_a_point(gazetteer):
+    store = PriceStore.from_csv(PRICE_CSV_PATH, include_synced=False)
+    assert (gazetteer.row_points(store) >= 0).all()
+
+
+def test_states_added_for_coverage_resolve_to_their_centroid(gazetteer):
+    assert gazetteer.locate("West Bengal") == pytest.approx(state_centroid(gazetteer, "West Bengal"))
+
+
+def test_misspelt_district_needs_matching_state(gazetteer):
+    assert gazetteer.locate("karnl") is None
+    assert gazetteer.locate("karnl, Haryana") == gazetteer.locate("Karnal")
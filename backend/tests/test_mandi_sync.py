@@ -0,0 +1,104 @@
+"""Offline tests for the incremental mandi sync against a fake API client."""
+
+import asyncio
+import csv
+import json
+from datetime import date
+
+import pytest
+
+from backend.tools import mandi_sync
+from backend.tools.price_store import PriceStore
+
+CSV_HEADER = list(mandi_sync.API_FIELDS)
+
+
+def csv_row(market, commodity, arrival, modal="2000"):
+    return ["Karnataka", "Kolar", market, commodity, "Local", "FAQ", arrival, "1500", "2500", modal]
+
+
+def api_record(market, commodity, arrival, modal="2000"):
+    return dict(zip(mandi_sync.API_FIELDS.values(), csv_row(market, commodity, arrival, modal)))
+
+
+class FakeMandiClient:
+    """Serves ``records_by_day`` one page at a time, like the data.gov.in resource."""
+
+    def __init__(self, records_by_day):
+        self.records_by_day = records_by_day
+        self.calls = []
+
+    async def fetch_page(self, offset, limit, filters=None):
+        day = filters["arrival_date"]
+        self.calls.append((day, offset))
+        return {"records": self.records_by_day.get(day, [])[offset:offset + limit]}
+
+
+@pytest.fixture
+def sync_env(tmp_path, monkeypatch):
+    base_csv = tmp_path / "prices.csv"
+    with open(base_csv, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        writer.writerow(csv_row("Kolar", "Tomato", "01/01/2026"))
+        writer.writerow(csv_row("Kolar", "Tomato", "10/10/2026"))
+    store = PriceStore.from_csv(base_csv, include_synced=False)
+
+    monkeypatch.setattr(mandi_sync, "SYNC_STATE_PATH", tmp_path / "state.json")
+    monkeypatch.setattr(mandi_sync, "SYNC_LOCK_PATH", tmp_path / "state.lock")
+    monkeypatch.setattr(mandi_sync, "SYNCED_CSV_PATH", tmp_path / "synced.csv")
+    monkeypatch.setattr(mandi_sync, "PAGE_SIZE", 2)
+    monkeypatch.setattr(mandi_sync, "get_price_store", lambda: store)
+    snapshots = []
+    monkeypatch.setattr(mandi_sync, "build_snapshot", lambda: snapshots.append(True))
+    (tmp_path / "state.json").write_text(json.dumps({"high_water_date": "10/10/2026"}))
+    return tmp_path, store, snapshots
+
+
+def test_sync_pages_dedupes_and_advances_high_water(sync_env):
+    tmp_path, _, snapshots = sync_env
+    client = FakeMandiClient({
+        "10/10/2026": [
+            api_record("Kolar", "Tomato", "10/10/2026"),   # already in the store
+            api_record("Mulbagal", "Tomato", "10/10/2026"),
+            api_record("Kolar", "Onion", "10/10/2026"),
+        ],
+        "12/10/2026": [
+            api_record("Kolar", "Tomato", "12/10/2026"),
+            api_record("Kolar", "Tomato", "12/10/2026"),   # repeated within the run
+        ],
+    })
+
+    stats = asyncio.run(mandi_sync.sync_once(client=client, today=date(2026, 10, 12)))
+
+    assert stats == {"pages": 5, "fetched": 5, "added": 3, "duplicates": 2}
+    assert client.calls == [
+        ("10/10/2026", 0), ("10/10/2026", 2), ("11/10/2026", 0), ("12/10/2026", 0), ("12/10/2026", 2),
+    ]
+    with open(tmp_path / "synced.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["Market"], r["Commodity"], r["Arrival_Date"]) for r in rows] == [
+        ("Mulbagal", "Tomato", "10/10/2026"), ("Kolar", "Onion", "10/10/2026"), ("Kolar", "Tomato", "12/10/2026"),
+    ]
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["high_water_date"] == "12/10/2026"
+    assert snapshots == [True]
+    assert not (tmp_path / "state.lock").exists()
+
+
+def test_sync_without_new_rows_skips_snapshot(sync_env):
+    _, _, snapshots = sync_env
+    client = FakeMandiClient({"10/10/2026": [api_record("Kolar", "Tomato", "10/10/2026")]})
+
+    stats = asyncio.run(mandi_sync.sync_once(client=client, today=date(2026, 10, 10)))
+
+    assert stats["added"] == 0 and stats["duplicates"] == 1
+    assert snapshots == []
+
+
+def test_existing_keys_only_cover_rows_from_the_high_water_mark(sync_env):
+    _, store, _ = sync_env
+    assert mandi_sync._existing_keys(store, date(2026, 10, 10)) == {
+        mandi_sync.dedupe_key("Kolar", "Tomato", "Local", "2026-10-10")
+    }
+    assert len(mandi_sync._existing_keys(store, date(2026, 1, 1))) == 2
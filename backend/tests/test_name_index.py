@@ -0,0 +1,40 @@
+"""Regression tests for misspelt commodity names in the name index."""
+
+import pytest
+
+from backend.tools.name_index import NameIndex, edit_distance
+
+COMMODITIES = ["Tomato", "Onion", "Onion Green", "Potato", "Wheat", "Garlic", "Paddy(Dhan)(Common)"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NameIndex(COMMODITIES)
+
+
+def resolved(index, text):
+    return [index.names[i] for i in index.resolve(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("tamoto", ["Tomato"]),
+    ("onoin", ["Onion", "Onion Green"]),
+    ("tomatoe", ["Tomato"]),
+    ("wheet", ["Wheat"]),
+])
+def test_misspelt_names_resolve(index, text, expected):
+    assert resolved(index, text) == expected
+
+
+def test_unrelated_word_resolves_to_nothing(index):
+    assert resolved(index, "xyzzy") == []
+
+
+def test_fuzzy_off_skips_edit_distance(index):
+    assert index.resolve("tamoto", fuzzy=False) == []
+
+
+def test_adjacent_swap_is_one_edit():
+    assert edit_distance("onoin", "onion", 2) == 1
+    assert edit_distance("tamoto", "tomato", 2) == 2
+    assert edit_distance("abcdef", "uvwxyz", 2) == 3
@@ -0,0 +1,134 @@
+"""
+Scheme Answer Cache
+-------------------
+Two-level cache for generated subsidy answers: an in-memory LRU in front of
+a SQLite file shared by every worker.
+
+Keys are built from the normalized question plus the (source file, version)
+of every document the answer was grounded on, so re-processing one PDF only
+orphans the answers that cited it; orphaned rows age out via the TTL and the
+size bound (least recently used rows are evicted first).
+
+Main functions:
+    get_answer_cache() -> AnswerCache
+        # .make_key(question, sources), .get(key), .put(key, answer)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.tools.metrics import get_metrics
+from backend.tools.name_index import normalize_name
+
+ANSWER_CACHE_PATH = Path(os.getenv(
+    "SCHEME_ANSWER_CACHE_PATH", Path(__file__).parent / "data" / "scheme_answer_cache.sqlite3"
+))
+ANSWER_CACHE_TTL_S = float(os.getenv("SCHEME_ANSWER_CACHE_TTL_S", 7 * 24 * 60 * 60))
+MEMORY_ENTRIES = 512
+DISK_ENTRIES = int(os.getenv("SCHEME_ANSWER_CACHE_MAX_ENTRIES", 5000))
+
+metrics = get_metrics("scheme_answers")
+
+
+class AnswerCache:
+    def __init__(self, path: Path = ANSWER_CACHE_PATH, ttl: float = ANSWER_CACHE_TTL_S,
+                 memory_entries: int = MEMORY_ENTRIES, disk_entries: int = DISK_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @staticmethod
+    def make_key(question: str, sources: Dict[str, str]) -> str:
+        """Hash of the normalized question and the sorted (source, version) pairs"""
+        parts = [normalize_name(question)] + [f"{name}@{version}" for name, version in sorted(sources.items())]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS answers_accessed ON answers(accessed)")
+            self._db.commit()
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                metrics.incr("memory_hits")
+                return entry[1]
+
+            try:
+                row = self._conn().execute(
+                    "SELECT answer, created FROM answers WHERE key = ? AND created > ?", (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    self._conn().execute("UPDATE answers SET accessed = ? WHERE key = ?", (now, key))
+                    self._conn().commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Answer cache read failed: {e}")
+                row = None
+
+            if row is None:
+                metrics.incr("misses")
+                return None
+            metrics.incr("disk_hits")
+            self._remember(key, row[1], row[0])
+            return row[0]
+
+    def put(self, key: str, answer: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, answer)
+            try:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO answers (key, answer, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, answer, now, now),
+                )
+                db.execute("DELETE FROM answers WHERE created <= ?", (now - self.ttl,))
+                db.execute(
+                    "DELETE FROM answers WHERE key IN ("
+                    "SELECT key FROM answers ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_entries,),
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Answer cache write failed: {e}")
+        metrics.incr("stores")
+
+    def _remember(self, key: str, created: float, answer: str):
+        self._memory[key] = (created, answer)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {**metrics.snapshot(), "memory_entries": len(self._memory)}
+
+
+_answer_cache: Optional[AnswerCache] = None
+
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
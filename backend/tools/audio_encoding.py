@@ -0,0 +1,105 @@
+"""
+Audio Delivery Formats
+----------------------
+Compressed encodings of the synthesized 16 kHz mono speech for clients on
+slow mobile data, picked by content negotiation.
+
+    json  base64 WAV inside JSON (the default, unchanged)
+    wav   raw WAV bytes                 audio/wav
+    ogg   Opus in Ogg, speech-tuned     audio/ogg
+    mp3   MP3                           audio/mpeg
+
+Opus/MP3 are encoded by ffmpeg (``FFMPEG_PATH``, as for pydub) fed raw PCM
+over pipes, in a bounded worker pool so encodes never run on the event loop
+and at most AUDIO_ENCODE_WORKERS ffmpeg processes run at once.
+
+Main functions:
+    negotiate_audio_format(requested, accept) -> str
+        # Explicit ?format= wins, otherwise the best match in the Accept header.
+    encode_audio_async(wav_bytes, fmt) -> bytes
+        # Off-loop encode of a WAV to ``fmt``.
+"""
+
+import asyncio
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from backend.tools.audio_utils import parse_wav
+from backend.tools.metrics import get_metrics
+
+FFMPEG = os.getenv("FFMPEG_PATH") or "ffmpeg"
+AUDIO_ENCODE_WORKERS = int(os.getenv("AUDIO_ENCODE_WORKERS", os.cpu_count() or 2))
+OPUS_BITRATE = os.getenv("TTS_OPUS_BITRATE", "24k")
+MP3_BITRATE = os.getenv("TTS_MP3_BITRATE", "32k")
+DEFAULT_AUDIO_FORMAT = "json"
+
+MEDIA_TYPES = {"wav": "audio/wav", "ogg": "audio/ogg", "mp3": "audio/mpeg"}
+ENCODER_ARGS: Dict[str, List[str]] = {
+    "ogg": ["-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip", "-f", "ogg"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", MP3_BITRATE, "-f", "mp3"],
+}
+# Accept-header media types -> format
+ACCEPT_TYPES = {
+    "application/json": "json",
+    "audio/wav": "wav", "audio/x-wav": "wav", "audio/wave": "wav",
+    "audio/ogg": "ogg", "audio/opus": "ogg",
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+}
+
+encode_pool = ThreadPoolExecutor(max_workers=AUDIO_ENCODE_WORKERS, thread_name_prefix="audio-encode")
+metrics = get_metrics("audio_encoding")
+
+
+class AudioEncodingError(RuntimeError):
+    pass
+
+
+def negotiate_audio_format(requested: Optional[str] = None, accept: Optional[str] = None) -> str:
+    """Format for a /tts response: ``requested`` if given, else the highest-q match in ``accept``"""
+    if requested:
+        return requested
+    best, best_q = DEFAULT_AUDIO_FORMAT, 0.0
+    for position, item in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        fmt = ACCEPT_TYPES.get(media_type.lower())
+        if fmt and q > best_q:  # ties keep the earlier (client-preferred) entry
+            best, best_q = fmt, q
+    return best
+
+
+def encode_audio(wav_bytes: bytes, fmt: str) -> bytes:
+    """``wav_bytes`` (16-bit PCM WAV) re-encoded as ``fmt``"""
+    if fmt == "wav":
+        return wav_bytes
+    if fmt not in ENCODER_ARGS:
+        raise ValueError(f"Unsupported audio format: {fmt}")
+    pcm, sample_rate, channels, sample_width, _ = parse_wav(wav_bytes)
+    if sample_width != 2:
+        raise ValueError("encode_audio expects 16-bit PCM")
+    command = [FFMPEG, "-hide_banner", "-loglevel", "error",
+               "-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0",
+               *ENCODER_ARGS[fmt], "pipe:1"]
+    with metrics.timer(f"{fmt}.encode"):
+        try:
+            proc = subprocess.run(command, input=pcm, capture_output=True, check=False)
+        except FileNotFoundError as e:
+            raise AudioEncodingError(f"ffmpeg not found ({FFMPEG})") from e
+    if proc.returncode != 0 or not proc.stdout:
+        raise AudioEncodingError(f"ffmpeg {fmt} encode failed: {proc.stderr.decode(errors='ignore')[-300:]}")
+    metrics.incr(f"{fmt}.bytes_in", len(wav_bytes))
+    metrics.incr(f"{fmt}.bytes_out", len(proc.stdout))
+    return proc.stdout
+
+
+async def encode_audio_async(wav_bytes: bytes, fmt: str) -> bytes:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(encode_pool, encode_audio, wav_bytes, fmt)
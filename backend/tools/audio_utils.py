@@ -0,0 +1,239 @@
+"""
+Audio Utilities
+---------------
+Small helpers for the raw PCM / WAV audio exchanged with the speech APIs.
+
+Main functions:
+    wav_header(sample_rate, channels, sample_width, data_size) -> bytes
+    wav_to_pcm16(data, sample_rate, channels) -> bytes
+        # Parse a WAV and convert to 16-bit PCM, only resampling/downmixing when needed.
+    pcm_to_wav(pieces, sample_rate, channels, sample_width) -> bytes
+        # Concatenate PCM into one preallocated WAV buffer.
+    vad_chunks(samples, sample_rate, max_chunk_ms) -> list[np.ndarray]
+        # Energy-based voice activity detection: speech-only chunks cut at pauses
+        # (fixed-length chunks of everything when it keeps too little to trust).
+"""
+
+import os
+import struct
+from typing import List, Tuple
+
+import numpy as np
+
+# Size fields of a WAV whose length isn't known up front (progressive streaming)
+STREAMING_WAV_SIZE = 0xFFFFFFFF
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def wav_header(sample_rate: int, channels: int, sample_width: int, data_size: int = STREAMING_WAV_SIZE) -> bytes:
+    """44-byte PCM WAV header; omit ``data_size`` for a stream of unknown length"""
+    byte_rate = sample_rate * channels * sample_width
+    riff_size = STREAMING_WAV_SIZE if data_size == STREAMING_WAV_SIZE else 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", riff_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate, channels * sample_width, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+class WavFormatError(ValueError):
+    pass
+
+
+def parse_wav(data: bytes) -> Tuple[memoryview, int, int, int, int]:
+    """(PCM data, sample_rate, channels, sample_width, format_tag) read straight from the RIFF chunks"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise WavFormatError("not a RIFF/WAVE file")
+    view = memoryview(data)
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, pos)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and size >= 26:
+                format_tag = struct.unpack_from("<H", data, body + 24)[0]
+            fmt = (sample_rate, channels, bits // 8, format_tag)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("data chunk before fmt chunk")
+            # Streaming writers leave the size unset; take everything that is there
+            end = len(data) if size == STREAMING_WAV_SIZE else min(len(data), body + size)
+            sample_rate, channels, sample_width, format_tag = fmt
+            frame = channels * sample_width
+            end -= (end - body) % frame
+            return view[body:end], sample_rate, channels, sample_width, format_tag
+        pos = body + size + (size & 1)
+    raise WavFormatError("no data chunk")
+
+
+def _samples_int16(pcm: memoryview, sample_width: int, format_tag: int) -> np.ndarray:
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        dtype = np.float32 if sample_width == 4 else np.float64
+        floats = np.frombuffer(pcm, dtype=dtype)
+        return (np.clip(floats, -1.0, 1.0) * 32767).astype(np.int16)
+    if format_tag != WAVE_FORMAT_PCM:
+        raise WavFormatError(f"unsupported WAV format tag {format_tag}")
+    if sample_width == 1:
+        return ((np.frombuffer(pcm, dtype=np.uint8).astype(np.int16) - 128) << 8).astype(np.int16)
+    if sample_width == 2:
+        return np.frombuffer(pcm, dtype="<i2")
+    if sample_width == 3:
+        raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3)
+        return ((raw[:, 2].astype(np.int8).astype(np.int16) << 8) | raw[:, 1]).astype(np.int16)
+    if sample_width == 4:
+        return (np.frombuffer(pcm, dtype="<i4") >> 16).astype(np.int16)
+    raise WavFormatError(f"unsupported sample width {sample_width}")
+
+
+def resample_int16(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """Linear-interpolation resample of mono int16 samples"""
+    if from_rate == to_rate or not len(samples):
+        return samples
+    n_out = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(n_out, dtype=np.float64) * (from_rate / to_rate)
+    resampled = np.interp(positions, np.arange(len(samples)), samples.astype(np.float32))
+    return np.round(resampled).astype(np.int16)
+
+
+def wav_to_pcm16(data: bytes, sample_rate: int, channels: int = 1):
+    """Raw 16-bit PCM at ``sample_rate``/``channels`` from WAV bytes.
+
+    Already-matching audio is returned as a view of ``data`` without decoding;
+    otherwise it is downmixed/upmixed and resampled with NumPy.
+    """
+    pcm, src_rate, src_channels, src_width, format_tag = parse_wav(data)
+    if (src_rate, src_channels, src_width, format_tag) == (sample_rate, channels, 2, WAVE_FORMAT_PCM):
+        return pcm
+    samples = _samples_int16(pcm, src_width, format_tag).reshape(-1, src_channels)
+    mono = samples[:, 0] if src_channels == 1 else samples.mean(axis=1).round().astype(np.int16)
+    mono = resample_int16(mono, src_rate, sample_rate)
+    if channels > 1:
+        return np.repeat(mono, channels).tobytes()
+    return mono.tobytes()
+
+
+def pcm_to_wav(pieces: List[bytes], sample_rate: int, channels: int, sample_width: int) -> bytes:
+    """One WAV file from PCM pieces: a single header plus one preallocated buffer"""
+    data_size = sum(len(piece) for piece in pieces)
+    out = bytearray(44 + data_size)
+    out[:44] = wav_header(sample_rate, channels, sample_width, data_size)
+    pos = 44
+    for piece in pieces:
+        out[pos:pos + len(piece)] = piece
+        pos += len(piece)
+    return bytes(out)
+
+
+# Voice activity detection: frame RMS energy over 16-bit PCM
+VAD_FRAME_MS = 30
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", 200))       # absolute floor (int16 scale, ~-44 dBFS)
+VAD_NOISE_FACTOR = float(os.getenv("VAD_NOISE_FACTOR", 3))  # speech must be this far above the noise floor
+VAD_MIN_PAUSE_MS = 300     # quieter stretches shorter than this stay inside speech
+VAD_PAD_MS = 150           # kept around every speech region so word edges aren't clipped
+VAD_MIN_SPEECH_MS = 90     # shorter bursts (clicks, taps) are dropped
+VAD_SPLIT_SEARCH_MS = 5000  # an over-long region is cut at its quietest frame within this window
+# Keeping less than this share of the input usually means quiet speech under VAD_MIN_RMS, not silence
+VAD_MIN_KEPT_RATIO = float(os.getenv("VAD_MIN_KEPT_RATIO", 0.1))
+
+
+def frame_rms(samples: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS energy per ``frame_len`` samples (the last partial frame is zero-padded)"""
+    n_frames = -(-len(samples) // frame_len)
+    frames = np.zeros(n_frames * frame_len, dtype=np.float32)
+    frames[:len(samples)] = samples
+    frames = frames.reshape(n_frames, frame_len)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_len)
+
+
+def speech_threshold(rms: np.ndarray) -> float:
+    """Noise floor (10th percentile) times VAD_NOISE_FACTOR, capped well below speech level"""
+    noise, loud = np.percentile(rms, [10, 90])
+    return float(max(VAD_MIN_RMS, min(noise * VAD_NOISE_FACTOR, loud * 0.25)))
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) index ranges where ``mask`` is True"""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def speech_regions(samples: np.ndarray, sample_rate: int) -> Tuple[List[Tuple[int, int]], np.ndarray, int]:
+    """(speech regions as [start, end) frame ranges, per-frame RMS, frame length in samples)"""
+    frame_len = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    rms = frame_rms(samples, frame_len)
+    if not len(rms):
+        return [], rms, frame_len
+    voiced = rms >= speech_threshold(rms)
+
+    # Bridge short pauses, drop short bursts, then pad what is left
+    frames = lambda ms: max(1, ms // VAD_FRAME_MS)
+    for start, end in _runs(~voiced):
+        if start > 0 and end < len(voiced) and end - start < frames(VAD_MIN_PAUSE_MS):
+            voiced[start:end] = True
+    for start, end in _runs(voiced):
+        if end - start < frames(VAD_MIN_SPEECH_MS):
+            voiced[start:end] = False
+    pad = frames(VAD_PAD_MS)
+    padded = voiced.copy()
+    for start, end in _runs(voiced):
+        padded[max(0, start - pad):min(len(voiced), end + pad)] = True
+    return _runs(padded), rms, frame_len
+
+
+def vad_spans(samples: np.ndarray, sample_rate: int, max_chunk_ms: int) -> List[List[Tuple[int, int]]]:
+    """Speech spans ([start, end) sample ranges) grouped into chunks of at most ``max_chunk_ms``.
+
+    Silence between speech regions is dropped; consecutive regions are packed
+    into one chunk while they fit. A single region longer than the limit is
+    cut at its quietest frame in the last VAD_SPLIT_SEARCH_MS before the limit.
+    """
+    regions, rms, frame_len = speech_regions(samples, sample_rate)
+    max_frames = max(1, max_chunk_ms // VAD_FRAME_MS)
+    search = max(1, min(max_frames - 1, VAD_SPLIT_SEARCH_MS // VAD_FRAME_MS))
+
+    pieces = []
+    for start, end in regions:
+        while end - start > max_frames:
+            window = rms[start + max_frames - search:start + max_frames]
+            cut = start + max_frames - search + int(np.argmin(window)) + 1
+            pieces.append((start, cut))
+            start = cut
+        pieces.append((start, end))
+
+    chunks, current, current_frames = [], [], 0
+    for start, end in pieces:
+        if current and current_frames + (end - start) > max_frames:
+            chunks.append(current)
+            current, current_frames = [], 0
+        current.append((start * frame_len, min(end * frame_len, len(samples))))
+        current_frames += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def fixed_chunks(samples: np.ndarray, sample_rate: int, max_chunk_ms: int) -> List[np.ndarray]:
+    """``samples`` cut into consecutive chunks of at most ``max_chunk_ms``"""
+    size = max(1, sample_rate * max_chunk_ms // 1000)
+    return [samples[start:start + size] for start in range(0, len(samples), size)]
+
+
+def vad_chunks(samples: np.ndarray, sample_rate: int, max_chunk_ms: int) -> List[np.ndarray]:
+    """Speech-only PCM chunks of at most ``max_chunk_ms``, cut at pauses (see ``vad_spans``)
+
+    Falls back to ``fixed_chunks`` of the whole input when VAD keeps less than
+    VAD_MIN_KEPT_RATIO of it, so a quiet recording is never dropped entirely.
+    """
+    chunks = [np.concatenate([samples[start:end] for start, end in chunk])
+              for chunk in vad_spans(samples, sample_rate, max_chunk_ms)]
+    kept = sum(len(chunk) for chunk in chunks)
+    if len(samples) and kept < VAD_MIN_KEPT_RATIO * len(samples):
+        print(f"⚠️ VAD kept {kept / len(samples):.0%} of the audio; sending it all in fixed chunks")
+        return fixed_chunks(samples, sample_rate, max_chunk_ms)
+    return chunks
@@ -4,26 +4,29 @@ Crop Diagnosis Tool
 This module provides functions to analyze crop images using Gemini LLM.
 It detects crop diseases and suggests remedies based on the image input.
 
-Main function:
-    diagnose_crop(image_bytes: bytes, query: str, api_key: str) -> dict
+Main functions:
+    diagnose_crop(image_bytes: bytes, query: str, api_key: str, mime_type: str) -> dict
         # Accepts image bytes and a query, returns disease diagnosis and treatment suggestions.
+    diagnose_crop_stream(image_bytes: bytes, query: str, api_key: str, mime_type: str) -> Iterator[str]
+        # Same diagnosis, yielding text as Gemini generates it.
 """
 import base64
 import requests
 import json
 
+GEMINI_MODEL_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash"
 
-def diagnose_crop(img_bytes, query, api_key):
+
+def build_diagnosis_payload(img_bytes, query, mime_type="image/jpeg"):
     # Encode image bytes to base64
     image_b64 = base64.b64encode(img_bytes).decode('utf-8')
 
-    # Prepare request payload
-    payload = {
+    return {
         "contents": [{
             "parts": [
                 {
                     "inline_data": {
-                        "mime_type": "image/jpeg",  # Ensure correct MIME type
+                        "mime_type": mime_type,
                         "data": image_b64
                     }
                 },
@@ -34,8 +37,13 @@ def diagnose_crop(img_bytes, query, api_key):
         }]
     }
 
+
+def diagnose_crop(img_bytes, query, api_key, mime_type="image/jpeg"):
+    # Prepare request payload
+    payload = build_diagnosis_payload(img_bytes, query, mime_type)
+
     # API URL and headers
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+    url = f"{GEMINI_MODEL_URL}:generateContent"
     headers = {
         "x-goog-api-key": api_key,
         "Content-Type": "application/json"
@@ -55,4 +63,27 @@ def diagnose_crop(img_bytes, query, api_key):
         except (KeyError, IndexError) as e:
             raise Exception(f"Could not parse Gemini LLM response: {e}. Full response: {response_data}")
     else:
-        raise Exception(f"Error: {response.status_code} - {response.text}")
\ No newline at end of file
+        raise Exception(f"Error: {response.status_code} - {response.text}")
+
+
+def diagnose_crop_stream(img_bytes, query, api_key, mime_type="image/jpeg"):
+    """Yield diagnosis text chunks from Gemini's server-sent event stream"""
+    url = f"{GEMINI_MODEL_URL}:streamGenerateContent?alt=sse"
+    headers = {
+        "x-goog-api-key": api_key,
+        "Content-Type": "application/json"
+    }
+
+    with requests.post(url, headers=headers, data=json.dumps(build_diagnosis_payload(img_bytes, query, mime_type)),
+                       stream=True, timeout=(5, 60)) as response:
+        if response.status_code != 200:
+            raise Exception(f"Error: {response.status_code} - {response.text}")
+
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            for candidate in event.get("candidates", [])[:1]:
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
@@ -0,0 +1,46 @@
+"""
+Cross-Process Lock Files
+------------------------
+Non-blocking "only one worker does this" guard for work that every uvicorn
+worker would otherwise repeat (PDF processing, snapshot publishing).
+
+A lock is a file created with ``O_EXCL`` holding the owner's pid. A crashed
+owner can leave it behind, so a lock older than ``stale_s`` is reclaimed.
+
+Main functions:
+    acquire_lock(path, stale_s) -> bool
+    release_lock(path)
+"""
+
+import os
+import time
+from pathlib import Path
+
+
+def acquire_lock(path: Path, stale_s: float) -> bool:
+    """Create ``path`` exclusively; False if another live process holds it."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except FileNotFoundError:
+            return acquire_lock(path, stale_s)  # released in between
+        if age < stale_s:
+            return False
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return acquire_lock(path, stale_s)
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def release_lock(path: Path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
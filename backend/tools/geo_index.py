@@ -0,0 +1,221 @@
+"""
+Mandi Geo Index
+---------------
+Nearest-mandi lookup over a bundled district gazetteer.
+
+``data/district_gazetteer.csv`` holds approximate district-headquarters
+coordinates (spelled as in the mandi data); markets are placed at their
+district's centroid. Points are bucketed into a fixed lat/lon grid and
+``GridIndex.nearest`` searches outward ring by ring, stopping as soon as no
+unvisited cell can beat the current k-th distance, so lookups stay
+sub-millisecond as the gazetteer grows to every district in India.
+
+Main function:
+    get_gazetteer() -> Gazetteer
+        # Shared gazetteer; .locate(text) and .nearest_markets(store, rows, lat, lon, k)
+"""
+
+import csv
+import math
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.tools.name_index import NameIndex, normalize_name
+
+GAZETTEER_PATH = Path(__file__).parent / "data" / "district_gazetteer.csv"
+GRID_CELL_DEG = 0.5
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = 111.2
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many (vectorized)."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """Uniform lat/lon bucket grid with expanding-ring k-nearest search."""
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_deg: float = GRID_CELL_DEG):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_deg = cell_deg
+        cells_i = np.floor(self.lats / cell_deg).astype(np.int64)
+        cells_j = np.floor(self.lons / cell_deg).astype(np.int64)
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for point_id, cell in enumerate(zip(cells_i.tolist(), cells_j.tolist())):
+            buckets.setdefault(cell, []).append(point_id)
+        self._buckets = {cell: np.array(ids, dtype=np.int64) for cell, ids in buckets.items()}
+        self._bounds = (
+            (int(cells_i.min()), int(cells_i.max()), int(cells_j.min()), int(cells_j.max()))
+            if len(self.lats) else (0, -1, 0, -1)
+        )
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _ring(self, ci: int, cj: int, r: int) -> List[np.ndarray]:
+        if r == 0:
+            cells = [(ci, cj)]
+        else:
+            cells = [(ci + di, cj + dj) for di in (-r, r) for dj in range(-r, r + 1)]
+            cells += [(ci + di, cj + dj) for dj in (-r, r) for di in range(-r + 1, r)]
+        return [self._buckets[c] for c in cells if c in self._buckets]
+
+    def _min_ring_km(self, lat: float, r: int) -> float:
+        """Lower bound on the distance to anything in ring ``r + 1``."""
+        far_lat = min(89.0, abs(lat) + (r + 1) * self.cell_deg)
+        return r * self.cell_deg * KM_PER_DEG * math.cos(math.radians(far_lat))
+
+    def nearest(self, lat: float, lon: float, k: int,
+                accept: Optional[np.ndarray] = None) -> List[Tuple[float, int]]:
+        """Up to ``k`` (distance_km, point_id) pairs, closest first.
+
+        ``accept`` is an optional boolean mask over points; rejected points are skipped.
+        """
+        if k <= 0 or not len(self):
+            return []
+        ci, cj = math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+        i_min, i_max, j_min, j_max = self._bounds
+        max_ring = max(abs(ci - i_min), abs(ci - i_max), abs(cj - j_min), abs(cj - j_max))
+
+        found: List[Tuple[float, int]] = []
+        for r in range(max_ring + 1):
+            buckets = self._ring(ci, cj, r)
+            if buckets:
+                ids = np.concatenate(buckets)
+                if accept is not None:
+                    ids = ids[accept[ids]]
+                if ids.size:
+                    dists = haversine_km(lat, lon, self.lats[ids], self.lons[ids])
+                    found.extend(zip(dists.tolist(), ids.tolist()))
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= self._min_ring_km(lat, r):
+                    break
+        found.sort()
+        return found[:k]
+
+
+class Gazetteer:
+    """District centroids plus name resolution and market-to-point mapping."""
+
+    def __init__(self, path: Path = GAZETTEER_PATH):
+        self.states: List[str] = []
+        self.districts: List[str] = []
+        lats, lons = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.states.append(row["State"].strip())
+                self.districts.append(row["District"].strip())
+                lats.append(float(row["Latitude"]))
+                lons.append(float(row["Longitude"]))
+        self.grid = GridIndex(np.array(lats), np.array(lons))
+        self.names = NameIndex.for_column("district", self.districts)
+        self.state_list = list(dict.fromkeys(self.states))
+        self.state_names = NameIndex.for_column("state", self.state_list)
+        self._state_ids = np.array([self.state_list.index(state) for state in self.states], dtype=np.int64)
+        self._point_by_pair = {
+            (normalize_name(s), normalize_name(d)): i for i, (s, d) in enumerate(zip(self.states, self.districts))
+        }
+        # (weak reference to the store the points were computed for, points)
+        self._row_points: Optional[Tuple[weakref.ref, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.districts)
+
+    def locate(self, text: Optional[str]) -> Optional[Tuple[float, float]]:
+        """Coordinates for a free-text location: "District", "State" or "District, State".
+
+        States and districts only match exactly (or via a bundled alias); a
+        misspelt district is accepted only alongside an exact state and only
+        among that state's districts. A bare state resolves to the centroid of
+        its gazetteer districts. Anything else is None rather than a guess.
+        """
+        if not text:
+            return None
+        parts = [part for part in (p.strip() for p in text.split(",")) if part]
+        states = [state for part in parts for state in self.state_names.exact(part)]
+        state = states[0] if states else None
+        for part in parts:
+            if self.state_names.exact(part):
+                continue
+            point_ids = self.names.exact(part)
+            if state is not None:
+                in_state = [i for i in point_ids if self._state_ids[i] == state]
+                # Misspelt districts are only trusted within the named state
+                point_ids = in_state or [i for i in self.names.resolve(part) if self._state_ids[i] == state]
+            if point_ids:
+                point_id = point_ids[0]
+                return float(self.grid.lats[point_id]), float(self.grid.lons[point_id])
+        if state is not None:
+            in_state = self._state_ids == state
+            return float(self.grid.lats[in_state].mean()), float(self.grid.lons[in_state].mean())
+        return None
+
+    def row_points(self, store) -> np.ndarray:
+        """Gazetteer point per store row (-1 when the district isn't in the gazetteer)."""
+        # A weakref (not id()) so a reloaded store at a recycled address isn't served stale points
+        if self._row_points is not None and self._row_points[0]() is store:
+            return self._row_points[1]
+        n_district = len(store.vocab["district"]) + 1
+        pair_keys = store.codes["state"].astype(np.int64) * n_district + (store.codes["district"] + 1)
+        unique_keys, inverse = np.unique(pair_keys, return_inverse=True)
+        unique_points = np.full(len(unique_keys), -1, dtype=np.int64)
+        for i, key in enumerate(unique_keys.tolist()):
+            state_code, district_code = divmod(key, n_district)
+            if state_code < 0 or district_code == 0:
+                continue
+            pair = (normalize_name(store.vocab["state"][state_code]),
+                    normalize_name(store.vocab["district"][district_code - 1]))
+            unique_points[i] = self._point_by_pair.get(pair, -1)
+        points = unique_points[inverse]
+        self._row_points = (weakref.ref(store), points)
+        return points
+
+    def nearest_markets(self, store, rows: np.ndarray, lat: float, lon: float, k: int) -> List[Dict]:
+        """The ``k`` markets closest to (lat, lon) among ``rows``, with prices."""
+        points = self.row_points(store)[rows]
+        known = points >= 0
+        rows, points = rows[known], points[known]
+        if rows.size == 0:
+            return []
+        accept = np.zeros(len(self), dtype=bool)
+        accept[points] = True
+
+        # Every accepted district has at least one market, so k districts cover k markets
+        markets = []
+        for distance, point_id in self.grid.nearest(lat, lon, k, accept):
+            district_rows = rows[points == point_id]
+            market_codes = store.codes["market"][district_rows]
+            for market_code in dict.fromkeys(market_codes.tolist()):
+                market_rows = district_rows[market_codes == market_code]
+                prices = store.modal_price[market_rows]
+                prices = prices[~np.isnan(prices)]
+                markets.append({
+                    "market": store.label("market", market_rows[0]),
+                    "district": self.districts[point_id],
+                    "state": self.states[point_id],
+                    "distance_km": round(distance, 1),
+                    "modal_price": int(prices.mean()) if prices.size else None,
+                    "records_found": int(prices.size),
+                })
+                if len(markets) >= k:
+                    return markets
+        return markets
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer()
+    return _gazetteer
@@ -0,0 +1,106 @@
+"""
+Crop Image Preprocessing
+------------------------
+Normalizes uploaded crop photos before they are sent to Gemini for diagnosis.
+
+Phone photos (often 12 MP, several MB) are decoded, rotated upright from
+their EXIF orientation, downsized so the longest edge is at most
+``IMAGE_MAX_EDGE`` pixels and re-encoded as a compact JPEG or WebP. The MIME
+type sent upstream is the one actually produced, not assumed. Small images
+that are already upright are sent as-is when re-encoding would not shrink
+them.
+
+JPEGs are decoded at reduced scale (libjpeg DCT scaling) when they are much
+larger than the target, so big photos never decode at full size. Work runs in
+a dedicated thread pool (Pillow releases the GIL while decoding, resizing and
+encoding), keeping it off the event loop.
+
+Main functions:
+    prepare_image_async(image_bytes) -> PreparedImage
+    prepare_image(image_bytes) -> PreparedImage
+        # .data, .mime_type, .original_bytes, .original_size, .size
+"""
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from backend.tools.metrics import get_metrics
+
+IMAGE_MAX_EDGE = int(os.getenv("CROP_IMAGE_MAX_EDGE", 1280))
+IMAGE_FORMAT = os.getenv("CROP_IMAGE_FORMAT", "JPEG").upper()  # JPEG or WEBP
+IMAGE_QUALITY = int(os.getenv("CROP_IMAGE_QUALITY", 85))
+IMAGE_WORKERS = int(os.getenv("CROP_IMAGE_WORKERS", 2))
+MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+image_pool = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+metrics = get_metrics("image_preprocess")
+
+
+class ImagePreprocessError(ValueError):
+    pass
+
+
+class PreparedImage(NamedTuple):
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    original_size: Tuple[int, int]
+    size: Tuple[int, int]
+
+
+def _flatten(image: Image.Image, keep_alpha: bool) -> Image.Image:
+    """RGB (or RGBA when the output format keeps transparency), alpha composited onto white otherwise"""
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if not has_alpha:
+        return image.convert("RGB")
+    image = image.convert("RGBA")
+    if keep_alpha:
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def prepare_image(image_bytes: bytes) -> PreparedImage:
+    with metrics.timer("prepare"):
+        try:
+            image = Image.open(io.BytesIO(image_bytes))
+            source_format = image.format
+            original_size = image.size
+            # JPEG: let the decoder scale down by up to 8x while staying above the target size
+            image.draft("RGB", (IMAGE_MAX_EDGE, IMAGE_MAX_EDGE))
+            orientation = image.getexif().get(0x0112, 1)
+            image = ImageOps.exif_transpose(image)
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+            raise ImagePreprocessError(f"Could not decode image: {e}") from e
+
+        resized = max(image.size) > IMAGE_MAX_EDGE
+        if resized:
+            image.thumbnail((IMAGE_MAX_EDGE, IMAGE_MAX_EDGE), Image.LANCZOS)
+
+        out = io.BytesIO()
+        _flatten(image, keep_alpha=IMAGE_FORMAT == "WEBP").save(
+            out, format=IMAGE_FORMAT, quality=IMAGE_QUALITY, optimize=True
+        )
+        data, mime_type = out.getvalue(), MIME_TYPES[IMAGE_FORMAT]
+
+        # Already small and upright: keep the original if re-encoding didn't help
+        if (not resized and orientation == 1 and source_format in MIME_TYPES
+                and len(image_bytes) <= len(data)):
+            data, mime_type = image_bytes, MIME_TYPES[source_format]
+
+    metrics.incr("bytes_in", len(image_bytes))
+    metrics.incr("bytes_out", len(data))
+    print(f"🖼️ Crop image {original_size[0]}x{original_size[1]} {len(image_bytes) / 1024:.0f} KB -> "
+          f"{image.size[0]}x{image.size[1]} {len(data) / 1024:.0f} KB ({mime_type})")
+    return PreparedImage(data, mime_type, len(image_bytes), original_size, image.size)
+
+
+async def prepare_image_async(image_bytes: bytes) -> PreparedImage:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(image_pool, prepare_image, image_bytes)
@@ -0,0 +1,168 @@
+"""
+Mandi API Client
+----------------
+Pooled, cached async client for the data.gov.in mandi price API.
+
+One ``httpx.AsyncClient`` per process keeps connections alive across requests,
+and every call has explicit connect/read timeouts. Responses are cached by
+(commodity, state, limit):
+  * fresh entries are served with no upstream call,
+  * stale entries (within the stale window) are served immediately while a
+    single background task revalidates them,
+  * concurrent misses for the same key share one upstream request,
+  * empty responses (an API hiccup, a day not yet published) are kept only for
+    ``CACHE_EMPTY_TTL_S`` and never served stale.
+
+Hit/miss counts and upstream latency are exposed via ``metrics``
+(namespace ``mandi_api``).
+
+Main function:
+    get_mandi_client() -> MandiApiClient
+        # Returns the process-wide client.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from backend.tools.metrics import get_metrics
+
+MANDI_API_URL = os.getenv(
+    "MANDI_API_URL", "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
+)
+CACHE_TTL_S = float(os.getenv("MANDI_CACHE_TTL_S", 15 * 60))
+CACHE_STALE_S = float(os.getenv("MANDI_CACHE_STALE_S", 6 * 60 * 60))
+CACHE_EMPTY_TTL_S = float(os.getenv("MANDI_CACHE_EMPTY_TTL_S", 60))
+CACHE_MAX_ENTRIES = 2048
+CONNECT_TIMEOUT_S = 3.0
+READ_TIMEOUT_S = 10.0
+MAX_CONNECTIONS = 20
+
+metrics = get_metrics("mandi_api")
+
+CacheKey = Tuple[str, str, int]
+
+
+class MandiApiClient:
+    def __init__(self, base_url: str = MANDI_API_URL, ttl: float = CACHE_TTL_S,
+                 stale_ttl: float = CACHE_STALE_S, max_entries: int = CACHE_MAX_ENTRIES,
+                 empty_ttl: float = CACHE_EMPTY_TTL_S):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.empty_ttl = empty_ttl
+        self.max_entries = max_entries
+        self._http: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[CacheKey, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, asyncio.Task] = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @staticmethod
+    def cache_key(commodity: str, state: Optional[str], limit: int) -> CacheKey:
+        return (commodity.strip().lower(), (state or "").strip().lower(), int(limit))
+
+    async def get_records(self, commodity: str, state: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Mandi records for a commodity (and state), served from cache when possible."""
+        key = self.cache_key(commodity, state, limit)
+        entry = self._cache.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            # A short TTL for empty results so a transient empty page can't hide prices for long
+            if age < (self.ttl if entry[1] else self.empty_ttl):
+                metrics.incr("hits")
+                self._cache.move_to_end(key)
+                return entry[1]
+            if entry[1] and age < self.ttl + self.stale_ttl:
+                # Serve stale now, revalidate once in the background
+                metrics.incr("stale_hits")
+                self._cache.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_fetch(key, commodity, state, limit)
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("coalesced")
+        else:
+            metrics.incr("misses")
+            task = self._start_fetch(key, commodity, state, limit)
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: CacheKey, commodity: str, state: Optional[str], limit: int) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch(key, commodity, state, limit))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._on_fetch_done(key, t))
+        return task
+
+    def _on_fetch_done(self, key: CacheKey, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            # Background revalidations have no awaiter; any stale entry is kept
+            print(f"Mandi API fetch failed for {key}: {task.exception()}")
+
+    async def _fetch(self, key: CacheKey, commodity: str, state: Optional[str], limit: int) -> List[Dict]:
+        filters = {"commodity": commodity}
+        if state:
+            filters["state"] = state
+        records = (await self._request(limit=limit, filters=filters)).get("records", [])
+
+        self._cache[key] = (time.monotonic(), records)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return records
+
+    async def fetch_page(self, offset: int, limit: int, filters: Optional[Dict[str, str]] = None) -> Dict:
+        """One uncached page of the raw resource (used by the background sync)."""
+        return await self._request(limit=limit, offset=offset, filters=filters or {})
+
+    async def _request(self, limit: int, filters: Dict[str, str], offset: int = 0) -> Dict:
+        params = {
+            "api-key": os.getenv("GOV_MANDI_PRICE_API_KEY"),
+            "format": "json",
+            "limit": limit,
+        }
+        if offset:
+            params["offset"] = offset
+        params.update({f"filters[{field}]": value for field, value in filters.items()})
+
+        metrics.incr("upstream_calls")
+        start = time.perf_counter()
+        try:
+            response = await self._client().get(self.base_url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            metrics.incr("upstream_errors")
+            raise
+        finally:
+            metrics.observe("upstream_latency", time.perf_counter() - start)
+
+    def stats(self) -> Dict:
+        return {**metrics.snapshot(), "cache_entries": len(self._cache), "inflight": len(self._inflight)}
+
+
+_client: Optional[MandiApiClient] = None
+
+
+def get_mandi_client() -> MandiApiClient:
+    global _client
+    if _client is None:
+        _client = MandiApiClient()
+    return _client
@@ -0,0 +1,232 @@
+"""
+Mandi Price Sync
+----------------
+Background incremental ingestion of the data.gov.in mandi resource into the
+local price store.
+
+Each run pages through the resource one arrival date at a time, starting at the
+stored high-water mark (the newest arrival date already ingested) and ending
+today, so only new days are pulled. Pages are deduplicated on
+(market, commodity, variety, arrival date) against the rows from the high-water
+mark on and appended to ``mandi_synced_prices.csv`` as they arrive, so memory
+stays bounded by the page size and the days being synced, not the whole store.
+When a run adds rows, a fresh price snapshot is published and every worker
+picks it up on its next lookup.
+
+Only one process syncs at a time (a lock file next to the sync state guards
+multi-worker deployments). Point ``MANDI_API_URL`` (or ``sync_once(client=...)``)
+at a local stub server to exercise it offline.
+
+Main functions:
+    sync_once() -> dict  (async)
+        # One incremental pass; returns counts for logging.
+    start_background_sync() -> asyncio.Task | None
+        # Schedules sync_once every MANDI_SYNC_INTERVAL_S seconds (0 disables).
+"""
+
+import asyncio
+import csv
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from backend.tools.mandi_api_client import MandiApiClient, get_mandi_client
+from backend.tools.metrics import get_metrics
+from backend.tools.price_snapshot import build_snapshot
+from backend.tools.price_store import (
+    DATE_COLUMN, DATE_FORMAT, PRICE_COLUMNS, SYNCED_CSV_PATH, PriceStore, get_price_store
+)
+
+SYNC_STATE_PATH = Path(__file__).parent / "data" / "mandi_sync_state.json"
+SYNC_LOCK_PATH = SYNC_STATE_PATH.with_suffix(".lock")
+SYNC_INTERVAL_S = float(os.getenv("MANDI_SYNC_INTERVAL_S", 0))
+PAGE_SIZE = 500
+MAX_PAGES_PER_DAY = 200
+MAX_BACKFILL_DAYS = 30  # first run with no history looks back this far
+STALE_LOCK_S = 60 * 60
+EPOCH = date(1970, 1, 1)  # PriceStore.arrival_day counts days from here
+
+# CSV column -> API record field
+API_FIELDS = {
+    "State": "state",
+    "District": "district",
+    "Market": "market",
+    "Commodity": "commodity",
+    "Variety": "variety",
+    "Grade": "grade",
+    DATE_COLUMN: "arrival_date",
+    PRICE_COLUMNS["min_price"]: "min_price",
+    PRICE_COLUMNS["max_price"]: "max_price",
+    PRICE_COLUMNS["modal_price"]: "modal_price",
+}
+
+metrics = get_metrics("mandi_sync")
+
+
+def dedupe_key(market: str, commodity: str, variety: str, arrival: str) -> str:
+    """Normalized (market, commodity, variety, arrival date) key."""
+    return "|".join(str(part or "").strip().lower() for part in (market, commodity, variety, arrival))
+
+
+def _existing_keys(store: PriceStore, since: date) -> Set[str]:
+    """Dedupe keys for the rows already in the store that arrived on or after ``since``.
+
+    A run only re-reads days from the high-water mark on, so older rows can't collide.
+    """
+    rows = np.flatnonzero(np.asarray(store.arrival_day) >= (since - EPOCH).days)
+    # Appending "" lets code -1 (missing) index the empty string
+    labels = {
+        name: np.array(store.vocab[name] + [""], dtype=object)[store.codes[name][rows]]
+        for name in ("market", "commodity", "variety")
+    }
+    days = np.asarray(store.arrival_day)[rows].astype("datetime64[D]").astype(str)
+    return {
+        dedupe_key(m, c, v, d)
+        for m, c, v, d in zip(labels["market"], labels["commodity"], labels["variety"], days)
+    }
+
+
+def _load_state() -> Dict:
+    try:
+        with open(SYNC_STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_state(state: Dict):
+    tmp = SYNC_STATE_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, SYNC_STATE_PATH)
+
+
+def _acquire_lock() -> bool:
+    try:
+        fd = os.open(SYNC_LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # A crashed run can leave the lock behind; reclaim it once it is old enough
+        if time.time() - os.stat(SYNC_LOCK_PATH).st_mtime < STALE_LOCK_S:
+            return False
+        os.remove(SYNC_LOCK_PATH)
+        return _acquire_lock()
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def _release_lock():
+    try:
+        os.remove(SYNC_LOCK_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def _parse_arrival(value: str) -> Optional[date]:
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT).date()
+    except (AttributeError, ValueError):
+        return None
+
+
+def _append_rows(rows: List[Dict]):
+    if not rows:
+        return
+    write_header = not SYNCED_CSV_PATH.exists()
+    with open(SYNCED_CSV_PATH, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(API_FIELDS))
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def _days(start: date, end: date) -> Iterable[date]:
+    day = start
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
+async def sync_once(client: Optional[MandiApiClient] = None, today: Optional[date] = None) -> Dict:
+    """Pull every arrival date from the high-water mark to today into the store."""
+    if not _acquire_lock():
+        print("⏭️ Mandi sync already running in another process, skipping")
+        return {"skipped": True}
+
+    client = client or get_mandi_client()
+    today = today or date.today()
+    stats = {"pages": 0, "fetched": 0, "added": 0, "duplicates": 0}
+    try:
+        state = _load_state()
+        store = await asyncio.to_thread(get_price_store)
+
+        high_water = _parse_arrival(state.get("high_water_date", ""))
+        if high_water is None:
+            latest = int(np.max(store.arrival_day)) if len(store) else None
+            high_water = (EPOCH + timedelta(days=latest)) if latest and latest > 0 \
+                else today - timedelta(days=MAX_BACKFILL_DAYS)
+        seen = await asyncio.to_thread(_existing_keys, store, high_water)
+
+        # The high-water day itself is re-read: late arrivals for it are deduped
+        for day in _days(high_water, today):
+            day_str = day.strftime(DATE_FORMAT)
+            for page in range(MAX_PAGES_PER_DAY):
+                payload = await client.fetch_page(page * PAGE_SIZE, PAGE_SIZE, {"arrival_date": day_str})
+                records = payload.get("records", [])
+                stats["pages"] += 1
+                stats["fetched"] += len(records)
+
+                new_rows = []
+                for record in records:
+                    arrival = _parse_arrival(record.get("arrival_date", ""))
+                    if arrival is None:
+                        continue
+                    key = dedupe_key(record.get("market"), record.get("commodity"),
+                                     record.get("variety"), arrival.isoformat())
+                    if key in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    new_rows.append({column: record.get(field, "") for column, field in API_FIELDS.items()})
+                    high_water = max(high_water, arrival)
+
+                await asyncio.to_thread(_append_rows, new_rows)
+                stats["added"] += len(new_rows)
+                if len(records) < PAGE_SIZE:
+                    break
+
+        state.update({"high_water_date": high_water.strftime(DATE_FORMAT), "last_run": time.time(), **stats})
+        _save_state(state)
+
+        if stats["added"]:
+            await asyncio.to_thread(build_snapshot)
+    finally:
+        _release_lock()
+
+    for name, value in stats.items():
+        metrics.incr(name, value)
+    metrics.incr("runs")
+    print(f"🔄 Mandi sync: {stats}")
+    return stats
+
+
+async def run_sync_forever(interval_s: float = SYNC_INTERVAL_S):
+    while True:
+        try:
+            await sync_once()
+        except Exception as e:
+            metrics.incr("errors")
+            print(f"❌ Mandi sync failed: {e}")
+        await asyncio.sleep(interval_s)
+
+
+def start_background_sync(interval_s: float = SYNC_INTERVAL_S) -> Optional[asyncio.Task]:
+    """Schedule the periodic sync on the running loop (disabled when interval is 0)."""
+    if interval_s <= 0:
+        return None
+    return asyncio.create_task(run_sync_forever(interval_s))
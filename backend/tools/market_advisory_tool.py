@@ -4,42 +4,117 @@ Market Advisory Tool
 This module provides functions to fetch and analyze market price trends for crops.
 It integrates with external market APIs and uses Gemini Pro (Google Vertex AI) for summarization and advice.
 
-Main function:
+Main functions:
     get_market_trend(crop_name: str, location: str) -> dict
         # Returns market trend summary and selling advice for the given crop and location.
+    get_market_trend_async(crop_name: str, location: str) -> dict  (async)
+        # Same, via the pooled/cached async mandi API client (used by the API server).
+    get_market_trends_batch(queries: list[tuple[str, str]]) -> list[dict]  (async)
+        # Same, for a whole crop portfolio in one call, with per-item status.
+    get_nearest_markets(crop_name: str, location: str, latitude: float, longitude: float) -> list[dict]
+        # Closest mandis trading the crop, by distance, with their modal prices.
 """ 
 
+import asyncio
 import requests
 import time
 import os
-import pandas as pd
+import numpy as np
 from pathlib import Path
 
+from backend.tools.mandi_api_client import (
+    CONNECT_TIMEOUT_S, MANDI_API_URL, READ_TIMEOUT_S, get_mandi_client
+)
+from backend.tools.geo_index import get_gazetteer
+from backend.tools.price_store import get_price_store
+
+NEAREST_MARKETS_K = 5
+
+def get_local_trend(crop_name, location=None):
+    """Precomputed price trend for a crop from the local store (None if unavailable)"""
+    try:
+        store = get_price_store()
+        return store.trend_summary(store.lookup(crop_name, location))
+    except Exception as e:
+        print(f"Trend lookup error: {e}")
+        return None
+
+def get_nearest_markets(crop_name, location=None, latitude=None, longitude=None, k=NEAREST_MARKETS_K):
+    """Closest markets with price data for a crop (None if no origin can be resolved)"""
+    try:
+        gazetteer = get_gazetteer()
+        if latitude is not None and longitude is not None:
+            origin = (latitude, longitude)
+        else:
+            origin = gazetteer.locate(location)
+        if origin is None:
+            return None
+        store = get_price_store()
+        return gazetteer.nearest_markets(store, store.lookup(crop_name), origin[0], origin[1], k)
+    except Exception as e:
+        print(f"Nearest market lookup error: {e}")
+        return None
+
 def get_market_trend_from_csv(crop_name, location=None):
-    """Get market trend from CSV file"""
-    df = pd.read_csv("backend/tools/data/GOV_MANDI_PRICES_CSV.csv")  # Adjust path as needed
-    if df is None:
+    """Get market trend from the indexed local price store"""
+    try:
+        store = get_price_store()
+    except Exception as e:
+        print(f"Price store error: {e}")
         return {"error": "No data source available"}
-    
-    # Filter by commodity
-    crop_data = df[df['Commodity'].str.lower().str.contains(crop_name.lower(), na=False)]
-    
-    # Filter by location if provided
-    if location:
-        crop_data = crop_data[crop_data['State'].str.lower().str.contains(location.lower(), na=False)]
 
-    if crop_data.empty:
+    # Commodity (and state, if given) lookup via the store's indexes
+    rows = store.lookup(crop_name, location)
+
+    if rows.size == 0:
         return {"message": f"No price data found for {crop_name} in {location or 'any location'}"}
     
     # Calculate average modal price
-    prices = crop_data['Modal_x0020_Price'].dropna().astype(float)
-    avg_price = int(prices.mean()) if not prices.empty else None
+    prices = store.modal_price[rows]
+    prices = prices[~np.isnan(prices)]
+    avg_price = int(prices.mean()) if prices.size else None
+    
+    return build_store_result(store, rows, avg_price, int(prices.size), crop_name, location)
+
+def build_store_result(store, rows, avg_price, records_found, crop_name, location=None):
+    """Response dict for rows answered from the local price store"""
+    return {
+        "average_modal_price": avg_price,
+        "records_found": records_found,
+        "markets": store.market_labels(rows, limit=5),
+        "commodity": crop_name,
+        "location": location,
+        "trend": store.trend_summary(rows),
+        "data_source": "CSV file"
+    }
+
+def fetch_mandi_records(crop_name, location=None, limit=10):
+    """Fetch raw records from the data.gov.in mandi API ([] if nothing came back)"""
+    API_KEY = os.getenv("GOV_MANDI_PRICE_API_KEY")
+    params = {
+        "api-key": API_KEY,
+        "format": "json",
+        "limit": limit,
+        "filters[commodity]": crop_name
+    }
+    
+    if location:
+        params["filters[state]"] = location
+    
+    response = requests.get(MANDI_API_URL, params=params, timeout=(CONNECT_TIMEOUT_S, READ_TIMEOUT_S))
     
-    # Get market names
+    if response.status_code == 200:
+        return response.json().get("records", [])
+    return []
+
+def summarize_api_records(records, crop_name, location=None):
+    """Response dict for records returned by the mandi API"""
+    prices = [int(r["modal_price"]) for r in records if r.get("modal_price")]
+    avg_price = sum(prices) // len(prices) if prices else None
     market_names = [
-        f"{row['Market']} ({row['District']})"
-        for _, row in crop_data.head(5).iterrows()
-        if pd.notna(row['Market']) and pd.notna(row['District'])
+        f"{r['market']} ({r['district']})"
+        for r in records[:5]
+        if r.get("market") and r.get("district")
     ]
     
     return {
@@ -48,49 +123,18 @@ def get_market_trend_from_csv(crop_name, location=None):
         "markets": market_names,
         "commodity": crop_name,
         "location": location,
-        "data_source": "CSV file"
+        "trend": get_local_trend(crop_name, location),
+        "data_source": "API"
     }
 
 def get_market_trend(crop_name, location=None, limit=10):
     # Try API first
-    API_KEY = os.getenv("GOV_MANDI_PRICE_API_KEY")
-    base_url = "https://api.data.gov.in/resource/9ef84268-d588-465a-a308-a864a43d0070"
-    
     try:
-        params = {
-            "api-key": API_KEY,
-            "format": "json",
-            "limit": limit,
-            "filters[commodity]": crop_name
-        }
+        records = fetch_mandi_records(crop_name, location, limit)
         
-        if location:
-            params["filters[state]"] = location
-        
-        response = requests.get(base_url, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            records = data.get("records", [])
-            
-            if records:
-                # API data available - process normally
-                prices = [int(r["modal_price"]) for r in records if r.get("modal_price")]
-                avg_price = sum(prices) // len(prices) if prices else None
-                market_names = [
-                    f"{r['market']} ({r['district']})"
-                    for r in records[:5]
-                    if r.get("market") and r.get("district")
-                ]
-                
-                return {
-                    "average_modal_price": avg_price,
-                    "records_found": len(prices),
-                    "markets": market_names,
-                    "commodity": crop_name,
-                    "location": location,
-                    "data_source": "API"
-                }
+        if records:
+            # API data available - process normally
+            return summarize_api_records(records, crop_name, location)
         
         # API failed or no data - fallback to CSV
         print("API failed or no data, falling back to CSV...")
@@ -98,4 +142,104 @@ def get_market_trend(crop_name, location=None, limit=10):
         
     except Exception as e:
         print(f"API error: {e}, falling back to CSV...")
-        return get_market_trend_from_csv(crop_name, location)
\ No newline at end of file
+        return get_market_trend_from_csv(crop_name, location)
+
+async def get_market_trend_async(crop_name, location=None, limit=10):
+    """Async get_market_trend using the pooled, cached mandi API client
+
+    Price store work (the first call parses the CSV) runs in a worker thread,
+    off the event loop.
+    """
+    try:
+        records = await get_mandi_client().get_records(crop_name, location, limit)
+        
+        if records:
+            return await asyncio.to_thread(summarize_api_records, records, crop_name, location)
+        
+        print("API failed or no data, falling back to CSV...")
+        return await asyncio.to_thread(get_market_trend_from_csv, crop_name, location)
+        
+    except Exception as e:
+        print(f"API error: {e}, falling back to CSV...")
+        return await asyncio.to_thread(get_market_trend_from_csv, crop_name, location)
+
+def _batch_key(crop_name, location):
+    return (crop_name.strip().lower(), (location or "").strip().lower())
+
+def get_store_results_batch(queries):
+    """Answer many (crop_name, location) queries with one pass over the price store"""
+    store = get_price_store()
+    rows, owners = store.lookup_many(queries)
+
+    # Per-query modal price sums/counts in one vectorized reduction
+    prices = store.modal_price[rows]
+    valid = ~np.isnan(prices)
+    sums = np.bincount(owners[valid], weights=prices[valid], minlength=len(queries))
+    counts = np.bincount(owners[valid], minlength=len(queries))
+    splits = np.searchsorted(owners, np.arange(len(queries) + 1))
+
+    results = []
+    for qi, (crop_name, location) in enumerate(queries):
+        query_rows = rows[splits[qi]:splits[qi + 1]]
+        if query_rows.size == 0:
+            results.append(None)
+            continue
+        avg_price = int(sums[qi] / counts[qi]) if counts[qi] else None
+        results.append(build_store_result(store, query_rows, avg_price, int(counts[qi]), crop_name, location))
+    return results
+
+def _answer_from_store(unique, api_records):
+    """Summaries of the API records plus one store batch for every query the API didn't answer"""
+    answers = {
+        key: summarize_api_records(records, *unique[key]) for key, records in api_records.items()
+    }
+
+    # Everything the API didn't answer goes through the store together
+    missing = [key for key in unique if key not in answers]
+    if missing:
+        try:
+            store_results = get_store_results_batch([unique[key] for key in missing])
+        except Exception as e:
+            print(f"Price store error: {e}")
+            store_results = [{"error": "No data source available"}] * len(missing)
+        answers.update(zip(missing, store_results))
+    return answers
+
+async def get_market_trends_batch(queries, limit=10):
+    """Market trends for a list of (crop_name, location) pairs in one call.
+
+    Identical queries are fetched from the mandi API once, concurrently, through
+    the pooled/cached client; anything
+    the API can't answer is filled from the local price store in a single batch.
+    Returns one {"crop_name", "location", "status", "result"} entry per query.
+    """
+    unique = {}
+    for crop_name, location in queries:
+        unique.setdefault(_batch_key(crop_name, location), (crop_name, location))
+
+    # The client's connection pool bounds concurrency and its cache absorbs repeats
+    client = get_mandi_client()
+    fetched = await asyncio.gather(
+        *(client.get_records(c, l, limit) for c, l in unique.values()), return_exceptions=True
+    )
+    api_records = {}
+    for key, (crop_name, location), records in zip(unique, unique.values(), fetched):
+        if isinstance(records, Exception):
+            print(f"API error for {crop_name} ({location}): {records}, falling back to CSV...")
+        elif records:
+            api_records[key] = records
+    # Store lookups (trends, the CSV fallback) run in a worker thread, off the event loop
+    answers = await asyncio.to_thread(_answer_from_store, unique, api_records)
+
+    results = []
+    for crop_name, location in queries:
+        result = answers.get(_batch_key(crop_name, location))
+        if result is None:
+            status = "no_data"
+            result = {"message": f"No price data found for {crop_name} in {location or 'any location'}"}
+        elif "error" in result:
+            status = "error"
+        else:
+            status = "ok"
+        results.append({"crop_name": crop_name, "location": location, "status": status, "result": result})
+    return results
\ No newline at end of file
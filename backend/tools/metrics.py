@@ -0,0 +1,68 @@
+"""
+Tool Metrics
+------------
+Tiny in-process counters and latency stats shared by the backend tools.
+
+Each tool grabs a namespace with ``get_metrics("mandi_api")`` and calls
+``incr`` / ``observe``; ``metrics_snapshot()`` returns every namespace as a
+plain dict for the ``/debug/metrics`` endpoint.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class Metrics:
+    """Counters plus count/total/max latency stats for one namespace."""
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stat = self._timings.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+            stat["count"] += 1
+            stat["total_s"] += seconds
+            stat["max_s"] = max(stat["max_s"], seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            timings = {
+                name: {**stat, "avg_s": stat["total_s"] / stat["count"] if stat["count"] else 0.0}
+                for name, stat in self._timings.items()
+            }
+            return {"counters": dict(self._counters), "timings": timings}
+
+
+_registry: Dict[str, Metrics] = {}
+_registry_lock = threading.Lock()
+
+
+def get_metrics(namespace: str) -> Metrics:
+    with _registry_lock:
+        if namespace not in _registry:
+            _registry[namespace] = Metrics(namespace)
+        return _registry[namespace]
+
+
+def metrics_snapshot() -> Dict:
+    with _registry_lock:
+        namespaces = list(_registry.values())
+    return {m.namespace: m.snapshot() for m in namespaces}
@@ -0,0 +1,200 @@
+"""
+Commodity / Location Name Index
+-------------------------------
+Precomputed name-resolution index that maps free-text crop and location names
+(English, romanized Hindi/Telugu, or native script) to canonical vocabulary IDs
+before any price lookup runs.
+
+Resolution order, first hit wins:
+  1. exact canonical name or bundled alias   (dict lookup)
+  2. whole-word match on a name's tokens     ("rice" -> "Paddy(Dhan)(Rice)" style names)
+  3. token prefix                            (sorted-token "trie" via bisect, "tom" -> Tomato)
+  4. fuzzy character-trigram similarity      (misspellings: "tomatoe" -> Tomato)
+  5. edit distance for short single words    (swapped letters: "tamoto" -> Tomato, "onoin" -> Onion)
+
+Aliases live in ``data/name_aliases.json`` keyed by column and canonical name.
+
+Main class:
+    NameIndex(names, aliases).resolve(text) -> list[int]
+        # Canonical IDs (positions in ``names``) for the best-matching names.
+"""
+
+import json
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ALIASES_PATH = Path(__file__).parent / "data" / "name_aliases.json"
+MIN_PREFIX_LEN = 3
+FUZZY_THRESHOLD = 0.45   # Dice coefficient over character trigrams
+FUZZY_MARGIN = 0.05      # keep every key within this of the best fuzzy score
+MAX_CACHED_QUERIES = 10000
+MAX_EDIT_QUERY_LEN = 8   # short words share too few trigrams, so they fall back to edit distance
+
+
+@lru_cache(maxsize=4096)
+def normalize_name(text: str) -> str:
+    """Lowercase, NFKC-normalize and turn punctuation into single spaces.
+
+    Letters, digits and combining marks are kept so Devanagari/Telugu vowel
+    signs survive.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    chars = [ch if unicodedata.category(ch)[0] in "LNM" else " " for ch in text]
+    return " ".join("".join(chars).split())
+
+
+def max_edits(length: int) -> int:
+    return 1 if length <= 4 else 2
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (an adjacent swap counts as one edit), capped at ``limit + 1``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return min(prev[-1], limit + 1)
+
+
+def trigrams(text: str) -> List[str]:
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+@lru_cache(maxsize=1)
+def load_aliases(path: Path = ALIASES_PATH) -> Dict[str, Dict[str, List[str]]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+class NameIndex:
+    """Resolution index over one vocabulary (commodity, state, district, ...)."""
+
+    def __init__(self, names: List[str], aliases: Optional[Dict[str, List[str]]] = None):
+        self.names = names
+        self._exact: Dict[str, List[int]] = defaultdict(list)
+        self._by_token: Dict[str, List[int]] = defaultdict(list)
+        self._trigram_postings: Dict[str, List[str]] = defaultdict(list)
+        self._key_trigrams: Dict[str, int] = {}
+
+        for name_id, name in enumerate(names):
+            key = normalize_name(name)
+            self._exact[key].append(name_id)
+            for token in set(key.split()):
+                self._by_token[token].append(name_id)
+
+        # Alias targets are canonical names; unknown targets are skipped quietly
+        for target, alias_list in (aliases or {}).items():
+            target_ids = self._exact.get(normalize_name(target), [])
+            for alias in alias_list:
+                for name_id in target_ids:
+                    if name_id not in self._exact[normalize_name(alias)]:
+                        self._exact[normalize_name(alias)].append(name_id)
+
+        self._sorted_tokens = sorted(self._by_token)
+        # Single words (name tokens and one-word aliases) the edit-distance fallback compares against
+        self._words: Dict[str, set] = defaultdict(set)
+        for token, ids in self._by_token.items():
+            self._words[token].update(ids)
+        for key, ids in self._exact.items():
+            if " " not in key:
+                self._words[key].update(ids)
+        for key in self._exact:
+            grams = set(trigrams(key))
+            self._key_trigrams[key] = len(grams)
+            for gram in grams:
+                self._trigram_postings[gram].append(key)
+
+        self._cache: Dict[Tuple[str, bool], Tuple[int, ...]] = {}
+
+    @classmethod
+    def for_column(cls, column: str, names: List[str]) -> "NameIndex":
+        return cls(names, load_aliases().get(column, {}))
+
+    def resolve(self, text: str, fuzzy: bool = True) -> List[int]:
+        """Canonical IDs for ``text`` (empty when nothing is close enough)."""
+        query = normalize_name(text)
+        if not query:
+            return []
+        key = (query, fuzzy)
+        if key not in self._cache:
+            if len(self._cache) >= MAX_CACHED_QUERIES:
+                self._cache.clear()
+            self._cache[key] = tuple(sorted(self._resolve(query, fuzzy)))
+        return list(self._cache[key])
+
+    def exact(self, text: str) -> List[int]:
+        """Canonical IDs whose name or bundled alias is exactly ``text`` (after normalization)."""
+        return sorted(self._exact.get(normalize_name(text), ()))
+
+    def _resolve(self, query: str, fuzzy: bool) -> Iterable[int]:
+        if query in self._exact:
+            return self._exact[query]
+
+        tokens = query.split()
+        token_hits = [set(self._by_token.get(token, ())) for token in tokens]
+        if token_hits and all(token_hits):
+            return set.intersection(*token_hits)
+
+        if len(query) >= MIN_PREFIX_LEN and len(tokens) == 1:
+            prefix_hits = set()
+            i = bisect_left(self._sorted_tokens, query)
+            while i < len(self._sorted_tokens) and self._sorted_tokens[i].startswith(query):
+                prefix_hits.update(self._by_token[self._sorted_tokens[i]])
+                i += 1
+            if prefix_hits:
+                return prefix_hits
+
+        if not fuzzy:
+            return []
+        return self._fuzzy(query) or self._edit_distance(query)
+
+    def _edit_distance(self, query: str) -> Iterable[int]:
+        if " " in query or not MIN_PREFIX_LEN <= len(query) <= MAX_EDIT_QUERY_LEN:
+            return []
+        limit = max_edits(len(query))
+        best, hits = limit + 1, set()
+        for word, ids in self._words.items():
+            distance = edit_distance(query, word, limit)
+            if distance < best:
+                best, hits = distance, set(ids)
+            elif distance == best and distance <= limit:
+                hits.update(ids)
+        return hits if best <= limit else []
+
+    def _fuzzy(self, query: str) -> Iterable[int]:
+        grams = set(trigrams(query))
+        shared = Counter()
+        for gram in grams:
+            for key in self._trigram_postings.get(gram, ()):
+                shared[key] += 1
+        scored = [
+            (2.0 * count / (len(grams) + self._key_trigrams[key]), key)
+            for key, count in shared.items()
+        ]
+        if not scored:
+            return []
+        best = max(score for score, _ in scored)
+        if best < FUZZY_THRESHOLD:
+            return []
+        hits = set()
+        for score, key in scored:
+            if score >= best - FUZZY_MARGIN:
+                hits.update(self._exact[key])
+        return hits
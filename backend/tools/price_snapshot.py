@@ -0,0 +1,112 @@
+"""
+Mandi Price Snapshot
+--------------------
+Columnar binary snapshot of the mandi price store, shared by every uvicorn worker.
+
+A snapshot is a directory of plain ``.npy`` arrays (codes, prices, dates and the
+prebuilt indexes) plus a ``vocab.json`` string dictionary. Workers open the arrays
+with ``np.load(mmap_mode="r")``, so all of them map the same page-cache pages and
+startup/RSS stay flat no matter how many workers run.
+
+Refreshing writes a new snapshot directory and then atomically replaces the
+``CURRENT`` pointer file; running workers notice the pointer's mtime change on
+their next lookup and remap.
+
+Build step:
+    python -m backend.tools.price_snapshot [path/to/prices.csv]
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SNAPSHOT_ROOT = Path(__file__).parent / "data" / "price_snapshots"
+CURRENT_POINTER = SNAPSHOT_ROOT / "CURRENT"
+KEEP_SNAPSHOTS = 2  # the live one plus its predecessor, for workers still mapping it
+
+
+def current_snapshot_dir() -> Optional[Path]:
+    """Directory named by the ``CURRENT`` pointer, if a snapshot has been built."""
+    try:
+        name = CURRENT_POINTER.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    path = SNAPSHOT_ROOT / name
+    return path if path.is_dir() else None
+
+
+def write_snapshot(arrays: Dict[str, np.ndarray], vocab: Dict[str, List[str]],
+                   meta: Optional[Dict] = None) -> Path:
+    """Write a new snapshot and atomically make it the current one."""
+    SNAPSHOT_ROOT.mkdir(parents=True, exist_ok=True)
+    name = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+    staging = SNAPSHOT_ROOT / f".{name}.tmp"
+    staging.mkdir()
+
+    for key, array in arrays.items():
+        np.save(staging / f"{key}.npy", np.ascontiguousarray(array), allow_pickle=False)
+    with open(staging / "vocab.json", "w", encoding="utf-8") as f:
+        json.dump(vocab, f, ensure_ascii=False)
+    with open(staging / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({**(meta or {}), "arrays": sorted(arrays), "created_at": time.time()}, f, indent=2)
+
+    final = SNAPSHOT_ROOT / name
+    os.rename(staging, final)
+
+    # Swap the pointer: readers see either the old or the new name, never a partial one
+    pointer_tmp = SNAPSHOT_ROOT / f".CURRENT.{os.getpid()}.tmp"
+    pointer_tmp.write_text(name, encoding="utf-8")
+    os.replace(pointer_tmp, CURRENT_POINTER)
+
+    _prune_old_snapshots(keep=name)
+    return final
+
+
+def open_snapshot(path: Path) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]], Dict]:
+    """Memory-map every array in ``path`` (zero-copy) and load its dictionaries."""
+    with open(path / "meta.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    with open(path / "vocab.json", "r", encoding="utf-8") as f:
+        vocab = json.load(f)
+    arrays = {key: np.load(path / f"{key}.npy", mmap_mode="r") for key in meta["arrays"]}
+    return arrays, vocab, meta
+
+
+def _prune_old_snapshots(keep: str):
+    snapshots = sorted(
+        (p for p in SNAPSHOT_ROOT.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    # Unlinked files stay valid for workers that still have them mapped
+    for old in snapshots[:-KEEP_SNAPSHOTS]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def build_snapshot(csv_path: Optional[Path] = None) -> Path:
+    """Parse the mandi CSV once and publish it as the current snapshot."""
+    from backend.tools.price_store import PRICE_CSV_PATH, PriceStore
+
+    csv_path = Path(csv_path or PRICE_CSV_PATH)
+    store = PriceStore.from_csv(csv_path)
+    return publish_store(store, source=str(csv_path))
+
+
+def publish_store(store, source: str = "") -> Path:
+    """Publish an already-built PriceStore (e.g. after an API pull) as a snapshot."""
+    # csv_mtime lets readers tell when the raw CSV has moved on past this snapshot
+    path = write_snapshot(store.to_arrays(), store.vocab,
+                          meta={"rows": len(store), "source": source, "csv_mtime": store.mtime})
+    print(f"💾 Wrote price snapshot {path.name} ({len(store)} rows)")
+    return path
+
+
+if __name__ == "__main__":
+    build_snapshot(sys.argv[1] if len(sys.argv) > 1 else None)
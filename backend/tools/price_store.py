@@ -0,0 +1,394 @@
+"""
+Mandi Price Store
+-----------------
+Process-wide, indexed in-memory copy of the mandi price data used by the market
+advisory fallback path. Free-text crop and location names are resolved to
+canonical codes through ``name_index`` before any rows are touched. The CSV is parsed once (lazily, on first use) and kept as
+dictionary-encoded columns, so lookups by commodity and state never rescan or
+re-allocate the whole table. The store is rebuilt only when the CSV's mtime changes.
+When a columnar snapshot has been published (see ``price_snapshot``) it is
+memory-mapped instead of parsing the CSV. Price-trend aggregates (see
+``price_trends``) are computed once at ingest and travel with the snapshot.
+
+Main function:
+    get_price_store() -> PriceStore
+        # Returns the shared store, reloading it if the source file changed.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.tools.name_index import NameIndex
+from backend.tools.price_trends import TrendTable, compute_trends, series_keys
+from backend.tools.file_lock import acquire_lock, release_lock
+from backend.tools.price_snapshot import (
+    CURRENT_POINTER, SNAPSHOT_ROOT, current_snapshot_dir, open_snapshot, publish_store
+)
+
+PRICE_CSV_PATH = Path(__file__).parent / "data" / "GOV_MANDI_PRICES_CSV.csv"
+# Rows appended by the background API sync (see ``mandi_sync``), same columns as the CSV
+SYNCED_CSV_PATH = Path(__file__).parent / "data" / "mandi_synced_prices.csv"
+PUBLISH_LOCK_PATH = SNAPSHOT_ROOT / ".publish.lock"
+PUBLISH_LOCK_STALE_S = 10 * 60
+
+# store attribute -> CSV column
+CATEGORY_COLUMNS = {
+    "state": "State",
+    "district": "District",
+    "market": "Market",
+    "commodity": "Commodity",
+    "variety": "Variety",
+}
+PRICE_COLUMNS = {
+    "min_price": "Min_x0020_Price",
+    "max_price": "Max_x0020_Price",
+    "modal_price": "Modal_x0020_Price",
+}
+DATE_COLUMN = "Arrival_Date"
+DATE_FORMAT = "%d/%m/%Y"
+
+INDEX_ARRAYS = ("commodity_order", "commodity_bounds", "pair_order", "pair_keys")
+
+# Arrival dates are stored as days since the epoch; missing dates use this sentinel
+NO_DATE = np.iinfo(np.int32).min
+
+
+class PriceStore:
+    """Dictionary-encoded mandi price table with sorted-key indexes.
+
+    Every categorical column is an int32 code array plus a vocabulary list
+    (code -1 means missing). Two indexes are kept:
+      * commodity -> rows, via a stable argsort and bucket offsets (O(1))
+      * (commodity, state) -> rows, via sorted composite keys (O(log n))
+    """
+
+    def __init__(self, codes: Dict[str, np.ndarray], vocab: Dict[str, List[str]],
+                 prices: Dict[str, np.ndarray], arrival_day: np.ndarray, mtime: float = 0.0,
+                 indexes: Optional[Dict[str, np.ndarray]] = None, trends: Optional[TrendTable] = None):
+        self.codes = codes
+        self.vocab = vocab
+        self.min_price = prices["min_price"]
+        self.max_price = prices["max_price"]
+        self.modal_price = prices["modal_price"]
+        self.arrival_day = arrival_day
+        self.mtime = mtime
+        self._names: Dict[str, NameIndex] = {}
+        self._parents: Dict[tuple, Dict[int, List[int]]] = {}
+        self._n_states = len(vocab["state"]) + 1  # +1 keeps code -1 in range
+        self.indexes = indexes if indexes is not None else self._build_indexes()
+        self.trends = trends if trends is not None else compute_trends(
+            self.series_keys(), self.arrival_day, self.min_price, self.max_price, self.modal_price, NO_DATE
+        )
+
+    # ─── Construction ──────────────────────────────────────────────────────────
+    @classmethod
+    def from_csv(cls, path: Path = PRICE_CSV_PATH, include_synced: bool = True) -> "PriceStore":
+        """Build from the mandi CSV plus any rows the background sync has appended."""
+        paths = [path]
+        if include_synced and SYNCED_CSV_PATH.exists():
+            paths.append(SYNCED_CSV_PATH)
+        mtime = max(os.stat(p).st_mtime for p in paths)
+        df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        return cls.from_frame(df, mtime=mtime)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, mtime: float = 0.0) -> "PriceStore":
+        codes, vocab = {}, {}
+        for name, column in CATEGORY_COLUMNS.items():
+            # Strip stray whitespace so "Tomato " and "Tomato" share a code
+            series = df[column].astype("string").str.strip().astype("category")
+            codes[name] = series.cat.codes.to_numpy(dtype=np.int32)
+            vocab[name] = list(series.cat.categories)
+        prices = {
+            name: pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64)
+            for name, column in PRICE_COLUMNS.items()
+        }
+        dates = pd.to_datetime(df[DATE_COLUMN], format=DATE_FORMAT, errors="coerce")
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        arrival_day = np.where(dates.isna().to_numpy(), NO_DATE, days).astype(np.int32)
+        return cls(codes, vocab, prices, arrival_day, mtime=mtime)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], vocab: Dict[str, List[str]],
+                    mtime: float = 0.0) -> "PriceStore":
+        """Rebuild a store from ``to_arrays()`` output without copying or re-indexing."""
+        codes = {name: arrays[f"code_{name}"] for name in CATEGORY_COLUMNS}
+        prices = {name: arrays[name] for name in PRICE_COLUMNS}
+        indexes = {name: arrays[name] for name in INDEX_ARRAYS}
+        return cls(codes, vocab, prices, arrays["arrival_day"], mtime=mtime, indexes=indexes,
+                   trends=TrendTable.from_arrays(arrays))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Every numeric array backing the store, including the indexes."""
+        arrays = {f"code_{name}": self.codes[name] for name in CATEGORY_COLUMNS}
+        arrays.update({name: getattr(self, name) for name in PRICE_COLUMNS})
+        arrays["arrival_day"] = self.arrival_day
+        arrays.update(self.indexes)
+        arrays.update(self.trends.to_arrays())
+        return arrays
+
+    def _build_indexes(self) -> Dict[str, np.ndarray]:
+        commodity = self.codes["commodity"]
+        state = self.codes["state"]
+
+        # commodity -> rows: stable argsort keeps CSV order inside each bucket
+        commodity_order = np.argsort(commodity, kind="stable")
+        commodity_bounds = np.searchsorted(
+            commodity[commodity_order], np.arange(len(self.vocab["commodity"]) + 1)
+        )
+
+        # (commodity, state) -> rows
+        pair_keys = commodity.astype(np.int64) * self._n_states + (state + 1)
+        pair_order = np.argsort(pair_keys, kind="stable")
+        return {
+            "commodity_order": commodity_order,
+            "commodity_bounds": commodity_bounds,
+            "pair_order": pair_order,
+            "pair_keys": pair_keys[pair_order],
+        }
+
+    def __len__(self) -> int:
+        return len(self.modal_price)
+
+    # ─── Lookups ───────────────────────────────────────────────────────────────
+    def rows_for_commodity(self, code: int) -> np.ndarray:
+        bounds = self.indexes["commodity_bounds"]
+        return self.indexes["commodity_order"][bounds[code]:bounds[code + 1]]
+
+    def names(self, column: str) -> NameIndex:
+        """Name-resolution index for a categorical column, built on first use."""
+        if column not in self._names:
+            self._names[column] = NameIndex.for_column(column, self.vocab[column])
+        return self._names[column]
+
+    def match_codes(self, column: str, text: str) -> List[int]:
+        """Canonical codes for free-text ``text`` (aliases, tokens, prefixes, fuzzy)."""
+        return self.names(column).resolve(text)
+
+    def _parent_codes(self, child: str, parent: str, child_codes: List[int]) -> List[int]:
+        """Parent codes (e.g. the states of some districts) seen together in the data."""
+        key = (child, parent)
+        if key not in self._parents:
+            n_parent = len(self.vocab[parent]) + 1
+            pairs = np.unique(self.codes[child].astype(np.int64) * n_parent + (self.codes[parent] + 1))
+            mapping: Dict[int, List[int]] = {}
+            for child_code, parent_code in zip(pairs // n_parent, pairs % n_parent - 1):
+                mapping.setdefault(int(child_code), []).append(int(parent_code))
+            self._parents[key] = mapping
+        mapping = self._parents[key]
+        return sorted({p for c in child_codes for p in mapping.get(c, ())})
+
+    def _resolve(self, primary: str, secondary: str, text: str) -> Tuple[List[int], Optional[tuple]]:
+        """Resolve ``text`` against ``primary`` names, falling back to ``secondary``.
+
+        Returns (primary codes, row filter). A secondary hit (a variety or a
+        district) is widened to its primary codes and returned as a
+        ``(column, codes)`` filter so only its own rows survive.
+        """
+        for fuzzy in (False, True):
+            codes = self.names(primary).resolve(text, fuzzy=fuzzy)
+            if codes:
+                return codes, None
+            codes = self.names(secondary).resolve(text, fuzzy=fuzzy)
+            if codes:
+                return self._parent_codes(secondary, primary, codes), (secondary, codes)
+        return [], None
+
+    def lookup(self, crop_name: str, location: Optional[str] = None) -> np.ndarray:
+        """Row indices (in CSV order) for a commodity, optionally within a state or district."""
+        rows, _ = self.lookup_many([(crop_name, location)])
+        return rows
+
+    def lookup_many(self, queries: List[Tuple[str, Optional[str]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows for many (crop_name, location) queries with one batched index probe.
+
+        Returns ``(rows, owners)`` sorted by query then CSV order, where
+        ``owners[i]`` is the position in ``queries`` that ``rows[i]`` answers.
+        """
+        all_states = range(-1, len(self.vocab["state"]))
+        keys, key_owner, row_filters = [], [], []
+        for qi, (crop_name, location) in enumerate(queries):
+            commodity_codes, crop_filter = self._resolve("commodity", "variety", crop_name)
+            if location:
+                state_codes, location_filter = self._resolve("state", "district", location)
+            else:
+                state_codes, location_filter = all_states, None
+            row_filters.extend((qi, f) for f in (crop_filter, location_filter) if f)
+            for c in commodity_codes:
+                for s in state_codes:
+                    keys.append(c * self._n_states + (s + 1))
+                    key_owner.append(qi)
+        if not keys:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        pair_keys = self.indexes["pair_keys"]
+        keys = np.asarray(keys, dtype=np.int64)
+        lo = np.searchsorted(pair_keys, keys, side="left")
+        lengths = np.searchsorted(pair_keys, keys, side="right") - lo
+
+        # Expand every [lo, hi) range into positions without a Python loop
+        total = int(lengths.sum())
+        starts = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        positions = starts + np.arange(total)
+        rows = np.asarray(self.indexes["pair_order"][positions], dtype=np.int64)
+        owners = np.repeat(np.asarray(key_owner, dtype=np.int64), lengths)
+
+        # Variety/district hits keep only their own rows
+        if row_filters:
+            keep = np.ones(rows.size, dtype=bool)
+            for qi, (column, codes) in row_filters:
+                owned = owners == qi
+                keep[owned] &= np.isin(self.codes[column][rows[owned]], codes)
+            rows, owners = rows[keep], owners[keep]
+
+        order = np.lexsort((rows, owners))
+        return rows[order], owners[order]
+
+    def series_keys(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """(commodity, state, market) series key for ``rows`` (all rows by default)."""
+        select = slice(None) if rows is None else rows
+        return series_keys(
+            self.codes["commodity"][select], self.codes["state"][select], self.codes["market"][select],
+            len(self.vocab["state"]), len(self.vocab["market"]),
+        )
+
+    def trend_summary(self, rows: np.ndarray) -> Optional[Dict]:
+        """Precomputed trend across the market series that ``rows`` belong to."""
+        if rows.size == 0:
+            return None
+        return self.trends.summarize(self.series_keys(rows))
+
+    def label(self, column: str, row: int) -> Optional[str]:
+        code = self.codes[column][row]
+        return self.vocab[column][code] if code >= 0 else None
+
+    def market_labels(self, rows: np.ndarray, limit: int = 5) -> List[str]:
+        labels = []
+        for row in rows[:limit]:
+            market, district = self.label("market", row), self.label("district", row)
+            if market and district:
+                labels.append(f"{market} ({district})")
+        return labels
+
+
+# ─── Process-wide instance ─────────────────────────────────────────────────────
+_store: Optional[PriceStore] = None
+_store_source: Optional[tuple] = None
+_store_lock = threading.Lock()
+
+
+def csv_mtime(path: Path) -> float:
+    """Newest mtime across the raw CSV and the synced-rows CSV."""
+    mtime = os.stat(path).st_mtime
+    if SYNCED_CSV_PATH.exists():
+        mtime = max(mtime, os.stat(SYNCED_CSV_PATH).st_mtime)
+    return mtime
+
+
+_snapshot_csv_mtimes: Dict[Path, float] = {}
+
+
+def _snapshot_csv_mtime(snapshot_dir: Path) -> float:
+    """CSV mtime a snapshot was built from (its meta is read once per snapshot)."""
+    if snapshot_dir not in _snapshot_csv_mtimes:
+        try:
+            with open(snapshot_dir / "meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        # Snapshots from before csv_mtime was recorded: their build time bounds it
+        _snapshot_csv_mtimes[snapshot_dir] = float(meta.get("csv_mtime", meta.get("created_at", 0.0)))
+    return _snapshot_csv_mtimes[snapshot_dir]
+
+
+def _current_source(path: Path) -> tuple:
+    """(kind, path, mtime) of the data the store should be built from.
+
+    A published snapshot wins over the raw CSV while it is at least as new as
+    the CSVs (its pointer file's mtime changes on every atomic swap). A CSV
+    replaced or edited after the snapshot was built takes over again.
+    """
+    mtime = csv_mtime(path)
+    snapshot_dir = current_snapshot_dir()
+    if snapshot_dir is not None and _snapshot_csv_mtime(snapshot_dir) >= mtime:
+        return ("snapshot", snapshot_dir, os.stat(CURRENT_POINTER).st_mtime)
+    return ("csv", path, mtime)
+
+
+def _load(source: tuple) -> Optional[PriceStore]:
+    """Store built from ``source``; None while another worker republishes a stale snapshot."""
+    kind, path, mtime = source
+    if kind == "snapshot":
+        print(f"📦 Loading mandi price store from snapshot {path.name}...")
+        arrays, vocab, _ = open_snapshot(path)
+        return PriceStore.from_arrays(arrays, vocab, mtime=mtime)
+    if current_snapshot_dir() is None:
+        print(f"📦 Loading mandi price store from csv {path.name}...")
+        return PriceStore.from_csv(path)
+
+    # The published snapshot is stale: one worker rebuilds and republishes it,
+    # the others keep what they have until the pointer swaps
+    if not acquire_lock(PUBLISH_LOCK_PATH, PUBLISH_LOCK_STALE_S):
+        return None
+    try:
+        print(f"📦 Snapshot is older than {path.name}, rebuilding it from the csv...")
+        store = PriceStore.from_csv(path)
+        try:
+            publish_store(store, source=str(path))
+        except OSError as e:
+            print(f"⚠️ Could not republish price snapshot: {e}")
+        return store
+    finally:
+        release_lock(PUBLISH_LOCK_PATH)
+
+
+def get_price_store(path: Path = PRICE_CSV_PATH) -> PriceStore:
+    """Return the shared store, (re)loading it when its source file changes."""
+    global _store, _store_source
+    source = _current_source(path)
+    if _store is not None and _store_source == source:
+        return _store
+    with _store_lock:
+        if _store is None or _store_source != source:
+            store = _load(source)
+            if store is None:
+                if _store is not None:
+                    # Another worker is republishing; rechecked on every call until the pointer swaps
+                    return _store
+                # Nothing loaded yet: the stale snapshot beats a second full CSV parse
+                print("⏭️ Price snapshot is being republished by another worker, mapping the current one")
+                source = ("snapshot", current_snapshot_dir(), os.stat(CURRENT_POINTER).st_mtime)
+                store = _load(source)
+            elif source[0] == "csv":
+                # Our own republished snapshot holds the same rows; don't remap it
+                source = _current_source(path)
+            _store, _store_source = store, source
+            print(f"✅ Price store ready: {len(_store)} rows, "
+                  f"{len(_store.vocab['commodity'])} commodities, {len(_store.vocab['state'])} states")
+    return _store
+    with _store_lock:
+        if _store is None or _store_source != source:
+            print(f"📦 Loading mandi price store from {source[0]} {Path(source[1]).name}...")
+            store = _load(source)
+            if store is None:
+                print("⏭️ Price snapshot is being republished by another worker")
+                if _store is not None:
+                    # Rechecked on every call until the new pointer appears
+                    return _store
+                # Nothing loaded yet: the stale snapshot beats waiting for a full CSV parse
+                snapshot_dir = current_snapshot_dir()
+                source = ("snapshot", snapshot_dir, os.stat(CURRENT_POINTER).st_mtime)
+                store = _load(source)
+            elif source[0] == "csv":
+                # Our own republished snapshot holds the same rows; don't remap it
+                source = _current_source(path)
+            _store, _store_source = store, source
+            print(f"✅ Price store ready: {len(_store)} rows, "
+                  f"{len(_store.vocab['commodity'])} commodities, {len(_store.vocab['state'])} states")
+    return _store
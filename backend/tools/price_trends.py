@@ -0,0 +1,149 @@
+"""
+Mandi Price Trends
+------------------
+Precomputed price-trend aggregates over ``Arrival_Date``, built once when the
+price store is ingested so requests never run a groupby.
+
+For every (commodity, state, market) series the table holds one row per arrival
+day with the day's modal/min/max prices, the rolling 7- and 30-day modal means,
+the 30-day min/max band and the percent change from the previous arrival.
+
+Main function:
+    compute_trends(...) -> TrendTable
+        # Vectorized daily aggregates for every market series.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TREND_ARRAYS = (
+    "keys", "bounds", "day", "modal", "low", "high",
+    "mean_7d", "mean_30d", "low_30d", "high_30d", "pct_change", "days_30d",
+)
+# Percent move (latest vs 30-day mean) below which a series counts as stable
+STABLE_BAND_PCT = 2.0
+
+
+def series_keys(commodity: np.ndarray, state: np.ndarray, market: np.ndarray,
+                n_state: int, n_market: int) -> np.ndarray:
+    """Composite int64 key per row for the (commodity, state, market) series."""
+    return ((commodity.astype(np.int64) * (n_state + 1) + (state + 1)) * (n_market + 1)) + (market + 1)
+
+
+class TrendTable:
+    """Daily aggregates stored as flat arrays, grouped by series key.
+
+    ``keys`` holds each series' key once (sorted) and rows
+    ``bounds[i]:bounds[i + 1]`` of the per-day arrays belong to ``keys[i]``,
+    ordered by day, so the latest aggregate for a series is ``bounds[i + 1] - 1``.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        for name in TREND_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {f"trend_{name}": array for name, array in self.arrays.items()}
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> Optional["TrendTable"]:
+        if not all(f"trend_{name}" in arrays for name in TREND_ARRAYS):
+            return None
+        return cls({name: arrays[f"trend_{name}"] for name in TREND_ARRAYS})
+
+    def latest_rows(self, row_keys: np.ndarray) -> np.ndarray:
+        """Index of the latest daily aggregate for each distinct key in ``row_keys``."""
+        wanted = np.unique(row_keys)
+        pos = np.searchsorted(self.keys, wanted)
+        pos = pos[(pos < len(self.keys)) & (self.keys[np.minimum(pos, len(self.keys) - 1)] == wanted)]
+        return self.bounds[pos + 1] - 1
+
+    def summarize(self, row_keys: np.ndarray) -> Optional[Dict]:
+        """Trend summary across every series touched by ``row_keys``."""
+        latest = self.latest_rows(row_keys)
+        if latest.size == 0:
+            return None
+
+        mean_30d = np.nanmean(self.mean_30d[latest])
+        modal = np.nanmean(self.modal[latest])
+        pct_vs_30d = (modal / mean_30d - 1.0) * 100.0 if mean_30d else 0.0
+        if pct_vs_30d > STABLE_BAND_PCT:
+            direction = "rising"
+        elif pct_vs_30d < -STABLE_BAND_PCT:
+            direction = "falling"
+        else:
+            direction = "stable"
+
+        pct_change = self.pct_change[latest]
+        pct_change = pct_change[~np.isnan(pct_change)]
+        as_of = np.datetime64(int(self.day[latest].max()), "D")
+        return {
+            "as_of": str(as_of),
+            "markets_tracked": int(latest.size),
+            "latest_modal_price": int(modal),
+            "mean_7d": int(np.nanmean(self.mean_7d[latest])),
+            "mean_30d": int(mean_30d),
+            "band_30d": {
+                "min": _as_int(np.nanmin(self.low_30d[latest])),
+                "max": _as_int(np.nanmax(self.high_30d[latest])),
+            },
+            "pct_change": round(float(pct_change.mean()), 2) if pct_change.size else None,
+            "pct_vs_30d_mean": round(float(pct_vs_30d), 2),
+            "direction": direction,
+            "days_observed_30d": int(self.days_30d[latest].max()),
+        }
+
+
+def _as_int(value) -> Optional[int]:
+    return None if np.isnan(value) else int(value)
+
+
+def compute_trends(keys: np.ndarray, arrival_day: np.ndarray, min_price: np.ndarray,
+                   max_price: np.ndarray, modal_price: np.ndarray, no_date: int) -> TrendTable:
+    """Build the trend table from row-level price arrays in one vectorized pass."""
+    valid = (arrival_day != no_date) & ~np.isnan(modal_price)
+    rows = pd.DataFrame({
+        "key": keys[valid],
+        "day": arrival_day[valid].astype(np.int64),
+        "modal": modal_price[valid],
+        "low": min_price[valid],
+        "high": max_price[valid],
+    })
+
+    # One aggregate per series per arrival day, sorted by (key, day)
+    daily = rows.groupby(["key", "day"], sort=True).agg(
+        modal=("modal", "mean"), low=("low", "min"), high=("high", "max")
+    ).reset_index()
+    daily.index = pd.to_datetime(daily["day"], unit="D")
+
+    by_series = daily.groupby("key", sort=False)
+    # groupby().rolling keeps group order, which is already daily's (key, day) order
+    rolling_7 = by_series["modal"].rolling("7D").mean().to_numpy()
+    rolling_30 = by_series["modal"].rolling("30D")
+    mean_30d = rolling_30.mean().to_numpy()
+    days_30d = rolling_30.count().to_numpy()
+    low_30d = by_series["low"].rolling("30D").min().to_numpy()
+    high_30d = by_series["high"].rolling("30D").max().to_numpy()
+    pct_change = (by_series["modal"].pct_change().to_numpy() * 100.0)
+
+    key_col = daily["key"].to_numpy()
+    unique_keys, starts = np.unique(key_col, return_index=True)
+    bounds = np.append(starts, len(key_col)).astype(np.int64)
+
+    return TrendTable({
+        "keys": unique_keys.astype(np.int64),
+        "bounds": bounds,
+        "day": daily["day"].to_numpy(dtype=np.int32),
+        "modal": daily["modal"].to_numpy(dtype=np.float64),
+        "low": daily["low"].to_numpy(dtype=np.float64),
+        "high": daily["high"].to_numpy(dtype=np.float64),
+        "mean_7d": rolling_7.astype(np.float64),
+        "mean_30d": mean_30d.astype(np.float64),
+        "low_30d": low_30d.astype(np.float64),
+        "high_30d": high_30d.astype(np.float64),
+        "pct_change": pct_change.astype(np.float64),
+        "days_30d": days_30d.astype(np.int32),
+    })
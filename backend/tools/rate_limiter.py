@@ -0,0 +1,73 @@
+"""
+Upstream Rate Limiting
+----------------------
+Process-wide token buckets for rate-limited upstream APIs (Sarvam TTS,
+translation, ...). Every request in the process draws from the same bucket,
+so concurrent users share the upstream quota instead of each sleeping a fixed
+delay between calls.
+
+Waiting time per bucket is recorded in ``metrics`` (namespace ``rate_limit``).
+
+Main function:
+    get_rate_limiter(name, rate, burst) -> TokenBucket
+        # Shared bucket; .acquire() blocks (threads), .acquire_async() awaits.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict
+
+from backend.tools.metrics import get_metrics
+
+metrics = get_metrics("rate_limit")
+
+
+class TokenBucket:
+    """``rate`` tokens per second, holding at most ``burst`` tokens."""
+
+    def __init__(self, name: str, rate: float, burst: float):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take ``tokens`` now (possibly going negative); return how long to wait for them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the seconds waited"""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        metrics.observe(f"{self.name}.wait", wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        metrics.observe(f"{self.name}.wait", wait)
+        return wait
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, burst: float) -> TokenBucket:
+    """The process-wide bucket for ``name`` (created with ``rate``/``burst`` on first use)"""
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(name, rate, burst)
+        return _buckets[name]
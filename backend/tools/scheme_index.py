@@ -0,0 +1,164 @@
+"""
+Scheme Search Index
+-------------------
+BM25 inverted index over the processed scheme records.
+
+Built once per load of ``processed_schemes.json``; a query only touches the
+postings of its own terms, so lookup cost follows the query, not the corpus.
+The boosts from the original keyword matcher are kept on top of BM25:
+  * whole-question phrase found in the scheme text    +10
+  * query word in the PDF file name                    +7
+  * query and scheme share a scheme type (insurance..) +5
+
+Main classes:
+    SchemeIndex(schemes).search(query, top_k) -> list[dict]
+        # Best-matching scheme records, highest score first.
+    Bm25(doc_term_freqs)
+        # Bare BM25 postings/scoring, shared with the passage index.
+"""
+
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+MIN_TERM_LEN = 3  # matches the old matcher's "skip short words"
+BM25_K1 = 1.5
+BM25_B = 0.75
+TERM_WEIGHT = 3.0
+PHRASE_BOOST = 10.0
+FILENAME_BOOST = 7.0
+SCHEME_TYPE_BOOST = 5.0
+
+# Indexed fields and their BM25F weights (term frequency multipliers)
+FIELD_WEIGHTS = {
+    "title": 2.0,
+    "description": 1.0,
+    "eligibility": 1.0,
+    "benefits": 1.0,
+    "source_file": 1.0,
+}
+
+SCHEME_KEYWORDS = {
+    'rythu': ['rythu', 'bandhu', 'telangana', 'farmer', 'support'],
+    'pmkisan': ['pm-kisan', 'kisan', 'income', 'support', '6000'],
+    'insurance': ['insurance', 'fasal', 'bima', 'crop', 'coverage'],
+    'subsidy': ['subsidy', 'fertilizer', 'seed', 'discount'],
+    'loan': ['loan', 'credit', 'kcc', 'agriculture']
+}
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) >= MIN_TERM_LEN]
+
+
+def scheme_types(text: str) -> List[str]:
+    return [name for name, keywords in SCHEME_KEYWORDS.items() if any(k in text for k in keywords)]
+
+
+def scheme_text(scheme: Dict) -> str:
+    return " ".join(str(scheme.get(field) or "") for field in FIELD_WEIGHTS).lower()
+
+
+class Bm25:
+    """Inverted index with BM25 scoring over pre-counted term frequencies."""
+
+    def __init__(self, doc_term_freqs: List[Dict[str, float]]):
+        self.postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        for doc_id, tf in enumerate(doc_term_freqs):
+            for term, freq in tf.items():
+                self.postings[term].append((doc_id, freq))
+        self.lengths = [sum(tf.values()) for tf in doc_term_freqs]
+        self._finish()
+
+    @classmethod
+    def from_postings(cls, postings: Dict[str, List[Tuple[int, float]]], lengths: List[float]) -> "Bm25":
+        index = cls.__new__(cls)
+        index.postings = defaultdict(list, {term: [tuple(p) for p in posting] for term, posting in postings.items()})
+        index.lengths = list(lengths)
+        index._finish()
+        return index
+
+    def _finish(self):
+        n = len(self.lengths)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def score(self, terms: List[str], scores: Optional[Dict[int, float]] = None,
+              weight: float = 1.0) -> Dict[int, float]:
+        """Add BM25 scores for ``terms`` into ``scores`` (only docs containing a term)."""
+        scores = defaultdict(float) if scores is None else scores
+        for term in set(terms):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, freq in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += weight * idf * freq * (BM25_K1 + 1) / (freq + norm)
+        return scores
+
+
+def top_scores(scores: Dict[int, float], top_k: int) -> List[Tuple[int, float]]:
+    """Highest-scoring (doc_id, score) pairs, ties broken by doc order."""
+    best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+    return [(doc_id, score) for doc_id, score in best if score > 0]
+
+
+class SchemeIndex:
+    def __init__(self, schemes: List[Dict]):
+        self.schemes = schemes
+        self._texts: List[str] = []
+        self._file_postings: Dict[str, List[int]] = defaultdict(list)
+        self._type_postings: Dict[str, List[int]] = defaultdict(list)
+        doc_term_freqs = []
+
+        for doc_id, scheme in enumerate(schemes):
+            tf = Counter()
+            for field, weight in FIELD_WEIGHTS.items():
+                for term in tokenize(str(scheme.get(field) or "")):
+                    tf[term] += weight
+            doc_term_freqs.append(tf)
+
+            text = scheme_text(scheme)
+            self._texts.append(text)
+            for term in set(tokenize(scheme.get("source_file", ""))):
+                self._file_postings[term].append(doc_id)
+            for name in scheme_types(text):
+                self._type_postings[name].append(doc_id)
+
+        self._bm25 = Bm25(doc_term_freqs)
+
+    def __len__(self) -> int:
+        return len(self.schemes)
+
+    def score(self, query: str) -> Dict[int, float]:
+        """Scores for every scheme sharing at least one signal with the query."""
+        query_lower = query.lower()
+        terms = tokenize(query)
+        scores = self._bm25.score(terms, weight=TERM_WEIGHT)
+
+        for term in set(terms):
+            for doc_id in self._file_postings.get(term, ()):
+                scores[doc_id] += FILENAME_BOOST
+
+        for name in scheme_types(query_lower):
+            for doc_id in self._type_postings.get(name, ()):
+                scores[doc_id] += SCHEME_TYPE_BOOST
+
+        # Phrase check only runs on schemes that already matched something
+        for doc_id in scores:
+            if query_lower in self._texts[doc_id]:
+                scores[doc_id] += PHRASE_BOOST
+        return scores
+
+    def search_scored(self, query: str, top_k: int = 3) -> List[Tuple[float, Dict]]:
+        return [(score, self.schemes[doc_id]) for doc_id, score in top_scores(self.score(query), top_k)]
+
+    def search(self, query: str, top_k: int = 3) -> List[Dict]:
+        return [scheme for _, scheme in self.search_scored(query, top_k)]
@@ -7,12 +7,23 @@ Uses Gemini Pro for both extraction and final summarization.
 
 import os
 import json
-import fitz  # PyMuPDF
+import hashlib
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 import google.generativeai as genai
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
 
+from backend.tools.answer_cache import get_answer_cache
+from backend.tools.file_lock import acquire_lock, release_lock
+from backend.tools.scheme_index import SchemeIndex
+from backend.tools.scheme_passages import PassageIndex, extract_pdf_text, get_passage_index, pdf_fingerprints
+from backend.tools.scheme_vectors import VectorIndex, get_vector_index, reciprocal_rank_fusion
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -33,16 +44,37 @@ model = genai.GenerativeModel('gemini-2.0-flash')
 
 PDF_DIR = Path(__file__).parent / "data" / "schemes"
 PROCESSED_PATH = Path(__file__).parent / "data" / "processed_schemes.json"
+PROCESS_LOCK_PATH = PROCESSED_PATH.with_suffix(".lock")
+PROCESS_LOCK_STALE_S = 30 * 60
+PASSAGE_TOP_K = 6
+EXTRACT_WORKERS = int(os.getenv("SCHEME_EXTRACT_WORKERS", os.cpu_count() or 1))
+LLM_CONCURRENCY = int(os.getenv("SCHEME_LLM_CONCURRENCY", 4))
+WATCH_INTERVAL_S = float(os.getenv("SCHEME_WATCH_INTERVAL_S", 30))
+
+# Parsed schemes and their search index, rebuilt only when processed_schemes.json changes
+_loaded_mtime: Optional[float] = None
+_loaded_schemes: List[Dict] = []
+_scheme_index: Optional[SchemeIndex] = None
+
+
+def get_scheme_index(schemes: List[Dict]) -> SchemeIndex:
+    """Search index for ``schemes`` (reused while the same list is loaded)"""
+    global _scheme_index
+    if _scheme_index is None or _scheme_index.schemes is not schemes:
+        _scheme_index = SchemeIndex(schemes)
+    return _scheme_index
 
 
 def extract_text_from_pdf(pdf_path: Path) -> str:
-    text = ""
-    with fitz.open(pdf_path) as doc:
-        for page in doc:
-            page_text = page.get_text()
-            if len(page_text.strip()) > 50:
-                text += page_text + "\n"
-    return text
+    return extract_pdf_text(pdf_path)
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
 
 def extract_scheme_info(text: str, filename: str) -> Dict[str, Any]:
@@ -79,8 +111,45 @@ def extract_scheme_info(text: str, filename: str) -> Dict[str, Any]:
         }
 
 
-def process_all_pdfs() -> List[Dict]:
-    """Process all PDFs with detailed logging"""
+def _read_processed() -> Dict:
+    try:
+        with open(PROCESSED_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_processed(schemes: List[Dict], no_text: Dict[str, str]):
+    PROCESSED_PATH.parent.mkdir(parents=True, exist_ok=True)
+    # Per-writer staging file: workers may process at the same time
+    tmp = PROCESSED_PATH.with_name(f".{PROCESSED_PATH.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+    data = {"schemes": schemes, "processed_count": len(schemes), "no_text_files": no_text}
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, PROCESSED_PATH)
+
+
+def _extract_texts(pdf_files: List[Path]) -> Dict[str, Any]:
+    """PyMuPDF text per file (an Exception value on failure), in parallel processes"""
+    workers = min(EXTRACT_WORKERS, len(pdf_files))
+    if workers <= 1:
+        results = {}
+        for pdf_file in pdf_files:
+            try:
+                results[pdf_file.name] = extract_text_from_pdf(pdf_file)
+            except Exception as e:
+                results[pdf_file.name] = e
+        return results
+
+    # spawn, not fork: this runs from the watcher and request threads, and a forked
+    # child can inherit locks (logging, httpx pools, the registry) held by other threads
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pdf_file.name: pool.submit(extract_pdf_text, pdf_file) for pdf_file in pdf_files}
+        return {name: (future.exception() or future.result()) for name, future in futures.items()}
+
+
+def process_all_pdfs(force: bool = False) -> List[Dict]:
+    """Process new or changed PDFs (by content hash) and merge them into the processed store"""
     print(f"🔍 Checking PDF directory: {PDF_DIR.absolute()}")
     
     if not PDF_DIR.exists():
@@ -88,38 +157,73 @@ def process_all_pdfs() -> List[Dict]:
         PDF_DIR.mkdir(parents=True, exist_ok=True)
         return []
 
-    pdf_files = list(PDF_DIR.glob("*.pdf"))
+    pdf_files = sorted(PDF_DIR.glob("*.pdf"))
     print(f"📁 Found {len(pdf_files)} PDF files: {[f.name for f in pdf_files]}")
     
     if not pdf_files:
         print("❌ No PDF files found!")
         return []
 
-    schemes = []
-    for pdf_file in pdf_files:
-        print(f"📄 Processing: {pdf_file.name}")
-        try:
-            text = extract_text_from_pdf(pdf_file)
-            if text and len(text.strip()) > 100:
-                print(f"✅ Extracted {len(text)} characters from {pdf_file.name}")
-                scheme_info = extract_scheme_info(text, pdf_file.name)
+    # Reuse every scheme whose PDF bytes are unchanged (failed extractions are retried)
+    hashes = {pdf_file.name: file_sha256(pdf_file) for pdf_file in pdf_files}
+    processed = {} if force else _read_processed()
+    previous = {
+        s.get("source_file"): s for s in processed.get("schemes", [])
+        if s.get("content_hash") and "error" not in s
+    }
+    done = {
+        name: previous[name] for name, digest in hashes.items()
+        if name in previous and previous[name]["content_hash"] == digest
+    }
+    # Scanned PDFs with no text layer are remembered too, so they aren't re-read every time
+    no_text = {
+        name: digest for name, digest in processed.get("no_text_files", {}).items()
+        if hashes.get(name) == digest
+    }
+    changed = [pdf_file for pdf_file in pdf_files if pdf_file.name not in done and pdf_file.name not in no_text]
+    print(f"♻️ {len(done) + len(no_text)} unchanged, {len(changed)} to process")
+
+    texts = _extract_texts(changed) if changed else {}
+    to_extract = []
+    for pdf_file in changed:
+        text = texts.get(pdf_file.name)
+        if isinstance(text, Exception):
+            print(f"❌ Error processing {pdf_file.name}: {text}")
+        elif text and len(text.strip()) > 100:
+            print(f"✅ Extracted {len(text)} characters from {pdf_file.name}")
+            to_extract.append((pdf_file.name, text))
+        else:
+            print(f"⚠️ No meaningful text extracted from {pdf_file.name}")
+            no_text[pdf_file.name] = hashes[pdf_file.name]
+
+    # Gemini calls are network-bound: a small thread pool bounds the concurrency
+    if to_extract:
+        with ThreadPoolExecutor(max_workers=max(1, LLM_CONCURRENCY)) as pool:
+            infos = pool.map(lambda item: extract_scheme_info(item[1], item[0]), to_extract)
+            for (name, _), scheme_info in zip(to_extract, infos):
                 if scheme_info:
-                    schemes.append(scheme_info)
+                    done[name] = {**scheme_info, "source_file": name, "content_hash": hashes[name]}
                     print(f"✅ Processed scheme: {scheme_info.get('title', 'Unknown')}")
-            else:
-                print(f"⚠️ No meaningful text extracted from {pdf_file.name}")
-        except Exception as e:
-            print(f"❌ Error processing {pdf_file.name}: {e}")
 
+    schemes = [done[pdf_file.name] for pdf_file in pdf_files if pdf_file.name in done]
     if schemes:
-        PROCESSED_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(PROCESSED_PATH, 'w', encoding='utf-8') as f:
-            json.dump({"schemes": schemes, "processed_count": len(schemes)}, f, indent=2, ensure_ascii=False)
+        _write_processed(schemes, no_text)
         print(f"💾 Saved {len(schemes)} processed schemes")
     
     return schemes
 
 
+def process_pdfs_once(force: bool = False) -> Optional[List[Dict]]:
+    """process_all_pdfs in at most one worker at a time; None if another worker is at it"""
+    if not acquire_lock(PROCESS_LOCK_PATH, PROCESS_LOCK_STALE_S):
+        print("⏭️ PDFs are being processed by another worker, serving the published schemes")
+        return None
+    try:
+        return process_all_pdfs(force)
+    finally:
+        release_lock(PROCESS_LOCK_PATH)
+
+
 def load_schemes(force_refresh=False) -> List[Dict]:
     """Load schemes with option to force refresh"""
     
@@ -141,148 +245,281 @@ def load_schemes(force_refresh=False) -> List[Dict]:
     
     if should_refresh or not PROCESSED_PATH.exists():
         print("🔄 Processing PDFs...")
-        return process_all_pdfs()
+        schemes = process_pdfs_once()
+        if schemes is not None:
+            return schemes
+        # The other worker publishes processed_schemes.json and our watcher reloads it
+        if not PROCESSED_PATH.exists():
+            return []
     
-    # Load existing processed data
+    # Load existing processed data (parsed and indexed once per file version)
+    global _loaded_mtime, _loaded_schemes
     try:
+        mtime = PROCESSED_PATH.stat().st_mtime
+        if mtime == _loaded_mtime:
+            return _loaded_schemes
         with open(PROCESSED_PATH, 'r', encoding='utf-8') as f:
             data = json.load(f)
             schemes = data.get("schemes", [])
             print(f"📚 Loaded {len(schemes)} schemes from cache")
-            return schemes
+        get_scheme_index(schemes)
+        _loaded_mtime, _loaded_schemes = mtime, schemes
+        return schemes
     except Exception as e:
         print(f"❌ Error loading processed schemes: {e}")
-        return process_all_pdfs()
+        return process_pdfs_once() or []
+
+
+class SchemeCorpus(NamedTuple):
+    schemes: List[Dict]
+    index: SchemeIndex
+    passages: Optional[PassageIndex]
+    fingerprint: Dict
+    versions: Dict[str, str]  # source file -> content hash (or size:mtime)
+    vectors: Optional[VectorIndex] = None
+
+
+def corpus_fingerprint() -> Dict:
+    """Size/mtime of every scheme PDF and of the processed store"""
+    try:
+        stat = PROCESSED_PATH.stat()
+        processed = [stat.st_size, stat.st_mtime]
+    except FileNotFoundError:
+        processed = None
+    return {"pdfs": pdf_fingerprints(PDF_DIR) if PDF_DIR.exists() else {}, "processed": processed}
+
+
+class SchemeRegistry:
+    """Process-wide scheme corpus: parsed schemes plus both search indexes.
+
+    Loaded once; afterwards a daemon thread re-stats the files every
+    ``WATCH_INTERVAL_S`` seconds and swaps in a rebuilt corpus when they change,
+    so ``corpus()`` never touches the filesystem on the request path. Every
+    worker runs a watcher, but only the one holding ``PROCESS_LOCK_PATH``
+    processes changed PDFs; the rest reload the store it publishes.
+    """
+
+    def __init__(self, watch_interval: float = WATCH_INTERVAL_S):
+        self.watch_interval = watch_interval
+        self._corpus: Optional[SchemeCorpus] = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def corpus(self) -> SchemeCorpus:
+        corpus = self._corpus
+        if corpus is None:
+            with self._lock:
+                if self._corpus is None:
+                    self._corpus = self._load()
+                corpus = self._corpus
+            self.start_watcher()
+        return corpus
+
+    def _load(self, force_refresh: bool = False) -> SchemeCorpus:
+        fingerprint = corpus_fingerprint()
+        schemes = load_schemes(force_refresh=force_refresh)
+        try:
+            passages = get_passage_index()
+        except Exception as e:
+            print(f"⚠️ Passage index unavailable: {e}")
+            passages = None
+        try:
+            vectors = get_vector_index(passages)
+        except Exception as e:
+            print(f"⚠️ Passage vectors unavailable: {e}")
+            vectors = None
+        # Processing may have rewritten the store, so fingerprint after loading
+        if fingerprint != corpus_fingerprint():
+            fingerprint = corpus_fingerprint()
+        versions = {name: f"{size}:{mtime}" for name, (size, mtime) in fingerprint["pdfs"].items()}
+        versions.update({s["source_file"]: s["content_hash"] for s in schemes if s.get("content_hash")})
+        return SchemeCorpus(schemes, get_scheme_index(schemes), passages, fingerprint, versions, vectors)
+
+    def reload(self, force_refresh: bool = False) -> SchemeCorpus:
+        with self._lock:
+            self._corpus = self._load(force_refresh)
+        return self._corpus
+
+    def check_for_changes(self) -> bool:
+        """Reload if any PDF or the processed store changed since the last load"""
+        corpus = self._corpus
+        if corpus is not None and corpus_fingerprint() == corpus.fingerprint:
+            return False
+        print("🔄 Scheme files changed, reloading corpus...")
+        self.reload()
+        return True
+
+    def start_watcher(self):
+        if self.watch_interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch, name="scheme-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"⚠️ Scheme watcher error: {e}")
+
+
+_registry: Optional[SchemeRegistry] = None
+
+
+def get_scheme_registry() -> SchemeRegistry:
+    global _registry
+    if _registry is None:
+        _registry = SchemeRegistry()
+    return _registry
 
 
 def simple_keyword_match(query: str, schemes: List[Dict], top_k=3) -> List[Dict]:
-    query_words = query.lower().split()
-    scored = []
-    for scheme in schemes:
-        text = (scheme.get("title", "") + scheme.get("description", "") +
-                scheme.get("eligibility", "") + scheme.get("benefits", "")).lower()
-        score = sum(text.count(word) for word in query_words)
-        if score > 0:
-            scored.append((score, scheme))
-    scored.sort(reverse=True, key=lambda x: x[0])
-    return [s for _, s in scored[:top_k]]
+    return get_scheme_index(schemes).search(query, top_k)
 
 
 def intelligent_scheme_match(query: str, schemes: List[Dict], top_k=3) -> List[Dict]:
-    """Enhanced matching with multiple strategies"""
-    query_lower = query.lower()
-    query_words = [word for word in query_lower.split() if len(word) > 2]  # Skip short words
-    
-    # Keywords for different scheme types
-    scheme_keywords = {
-        'rythu': ['rythu', 'bandhu', 'telangana', 'farmer', 'support'],
-        'pmkisan': ['pm-kisan', 'kisan', 'income', 'support', '6000'],
-        'insurance': ['insurance', 'fasal', 'bima', 'crop', 'coverage'],
-        'subsidy': ['subsidy', 'fertilizer', 'seed', 'discount'],
-        'loan': ['loan', 'credit', 'kcc', 'agriculture']
-    }
+    """BM25 over scheme fields plus phrase, scheme-type and file-name boosts"""
+    scored_schemes = get_scheme_index(schemes).search_scored(query, top_k)
+
+    print(f"🔍 Query: '{query}' matched {len(scored_schemes)} schemes")
+    for score, scheme in scored_schemes[:3]:
+        print(f"   Score {score:.1f}: {scheme.get('title', 'Unknown')} ({scheme.get('source_file', 'Unknown')})")
     
-    scored_schemes = []
+    return [scheme for _, scheme in scored_schemes]
+
+
+def search_scheme_passages(question: str, top_k=PASSAGE_TOP_K,
+                           corpus: Optional[SchemeCorpus] = None) -> List[Dict]:
+    """Most relevant page-tagged passages: BM25 and vector rankings fused"""
+    try:
+        corpus = corpus or get_scheme_registry().corpus()
+        if corpus.passages is None:
+            return []
+        rankings = [corpus.passages.search_ids(question, top_k * 2)]
+        if corpus.vectors is not None:
+            rankings.append(corpus.vectors.search(question, top_k * 2))
+        passages = [
+            {**corpus.passages.passages[pid], "score": round(score, 4)}
+            for pid, score in reciprocal_rank_fusion(rankings, top_k)
+        ]
+    except Exception as e:
+        print(f"⚠️ Passage search failed: {e}")
+        return []
+    print(f"📑 Query: '{question}' matched {len(passages)} passages")
+    for p in passages:
+        print(f"   Score {p['score']:.4f}: {p['source_file']} p.{p['page_start']}-{p['page_end']}")
+    return passages
+
+
+def build_passage_context(passages: List[Dict], schemes: List[Dict]) -> str:
+    titles = {s.get('source_file'): s.get('title') for s in schemes}
+    return "\n\n".join([
+        f"**{titles.get(p['source_file']) or p['source_file']}** "
+        f"(Source: {p['source_file']}, pages {p['page_start']}-{p['page_end']})\n{p['text']}"
+        for p in passages
+    ])
+
+
+def prepare_scheme_answer(question: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Retrieval half of answering: ``(ready_answer, prompt, cache_key)``.
+
+    ``ready_answer`` is set for cache hits and "nothing found" replies; otherwise
+    ``prompt`` is what to send to Gemini and ``cache_key`` where to store the result.
+    """
+    print(f"🤔 Processing query: '{question}'")
     
-    for scheme in schemes:
-        score = 0
-        scheme_text = (
-            scheme.get('title', '') + ' ' +
-            scheme.get('description', '') + ' ' +
-            scheme.get('eligibility', '') + ' ' +
-            scheme.get('benefits', '') + ' ' +
-            scheme.get('source_file', '')
-        ).lower()
-        
-        # Strategy 1: Exact phrase matching (highest weight)
-        for phrase in [query_lower]:
-            if phrase in scheme_text:
-                score += 10
-        
-        # Strategy 2: Individual word matching
-        for word in query_words:
-            count = scheme_text.count(word)
-            if count > 0:
-                score += count * 3
-        
-        # Strategy 3: Scheme type detection
-        for scheme_type, keywords in scheme_keywords.items():
-            if any(keyword in query_lower for keyword in keywords):
-                if any(keyword in scheme_text for keyword in keywords):
-                    score += 5
-        
-        # Strategy 4: File name matching
-        source_file = scheme.get('source_file', '').lower()
-        for word in query_words:
-            if word in source_file:
-                score += 7
-        
-        if score > 0:
-            scored_schemes.append((score, scheme))
+    # In-memory corpus; file changes are picked up by the registry's watcher
+    corpus = get_scheme_registry().corpus()
+    schemes = corpus.schemes
     
-    # Sort by score (highest first)
-    scored_schemes.sort(key=lambda x: x[0], reverse=True)
+    passages = search_scheme_passages(question, corpus=corpus)
+
+    if not schemes and not passages:
+        return "❌ No scheme information is currently available. Please ensure PDF files are in the schemes directory and restart the application.", None, None
+
+    print(f"📊 Available schemes: {[s.get('title', 'Unknown') for s in schemes]}")
     
-    print(f"🔍 Query: '{query}' matched {len(scored_schemes)} schemes")
-    for score, scheme in scored_schemes[:3]:
-        print(f"   Score {score}: {scheme.get('title', 'Unknown')} ({scheme.get('source_file', 'Unknown')})")
+    # Passages from the full documents first; whole-scheme summaries as fallback
+    matched = [] if passages else intelligent_scheme_match(question, schemes)
     
-    return [scheme for _, scheme in scored_schemes[:top_k]]
+    if not passages and not matched:
+        available_titles = [s.get('title', 'Unknown') for s in schemes[:3]]
+        return f"🔍 I couldn't find schemes specifically matching '{question}'.\n\nAvailable schemes include:\n" + \
+               "\n".join([f"• {title}" for title in available_titles]) + \
+               "\n\nTry asking about one of these specific schemes or use different keywords.", None, None
+
+    # Answers are cached per normalized question and version of every cited document
+    sources = {p['source_file'] for p in passages} or {m.get('source_file', '') for m in matched}
+    cache_key = get_answer_cache().make_key(question, {name: corpus.versions.get(name, "") for name in sources})
+    cached = get_answer_cache().get(cache_key)
+    if cached is not None:
+        print("⚡ Answer served from cache")
+        return cached, None, None
+
+    # Build context with matched passages (or schemes)
+    context = build_passage_context(passages, schemes) if passages else "\n\n".join([
+        f"**{s['title']}** (Source: {s.get('source_file', 'Unknown')})\n" +
+        f"Description: {s.get('description', 'N/A')}\n" +
+        f"Eligibility: {s.get('eligibility', 'N/A')}\n" +
+        f"Benefits: {s.get('benefits', 'N/A')}\n" +
+        f"Application: {s.get('application_process', 'N/A')}\n" +
+        f"Documents: {s.get('documents_required', 'N/A')}"
+        for s in matched
+    ])
+
+    prompt = f"""
+    A farmer asks: "{question}"
+
+    Based on the following scheme information (excerpts) from official documents:
+    {context}
+
+    Provide a comprehensive, practical answer that:
+    1. Directly addresses their question about the specific scheme
+    2. Explains key benefits and eligibility clearly
+    3. Gives step-by-step application process
+    4. Lists required documents
+    5. Provides practical tips for successful application
+    6. Uses simple, farmer-friendly language
+
+    Be specific and actionable. Reference the exact scheme name(s) found, and the
+    source document and page where relevant.
+    """
+    return None, prompt, cache_key
 
 
 def answer_scheme_query(question: str) -> str:
     """Enhanced scheme query with better processing and matching"""
     try:
-        print(f"🤔 Processing query: '{question}'")
-        
-        # Force fresh processing for debugging (remove in production)
-        schemes = load_schemes(force_refresh=False)
-        
-        if not schemes:
-            return "❌ No scheme information is currently available. Please ensure PDF files are in the schemes directory and restart the application."
-
-        print(f"📊 Available schemes: {[s.get('title', 'Unknown') for s in schemes]}")
-        
-        # Use intelligent matching
-        matched = intelligent_scheme_match(question, schemes)
-        
-        if not matched:
-            available_titles = [s.get('title', 'Unknown') for s in schemes[:3]]
-            return f"🔍 I couldn't find schemes specifically matching '{question}'.\n\nAvailable schemes include:\n" + \
-                   "\n".join([f"• {title}" for title in available_titles]) + \
-                   "\n\nTry asking about one of these specific schemes or use different keywords."
-
-        # Build context with matched schemes
-        context = "\n\n".join([
-            f"**{s['title']}** (Source: {s.get('source_file', 'Unknown')})\n" +
-            f"Description: {s.get('description', 'N/A')}\n" +
-            f"Eligibility: {s.get('eligibility', 'N/A')}\n" +
-            f"Benefits: {s.get('benefits', 'N/A')}\n" +
-            f"Application: {s.get('application_process', 'N/A')}\n" +
-            f"Documents: {s.get('documents_required', 'N/A')}"
-            for s in matched
-        ])
-
-        prompt = f"""
-        A farmer asks: "{question}"
-
-        Based on the following scheme information from official documents:
-        {context}
-
-        Provide a comprehensive, practical answer that:
-        1. Directly addresses their question about the specific scheme
-        2. Explains key benefits and eligibility clearly
-        3. Gives step-by-step application process
-        4. Lists required documents
-        5. Provides practical tips for successful application
-        6. Uses simple, farmer-friendly language
-
-        Be specific and actionable. Reference the exact scheme name(s) found.
-        """
+        ready, prompt, cache_key = prepare_scheme_answer(question)
+        if ready is not None:
+            return ready
 
         response = model.generate_content(prompt)
-        return response.text.strip()
+        answer = response.text.strip()
+        get_answer_cache().put(cache_key, answer)
+        return answer
 
     except Exception as e:
         print(f"❌ Error in answer_scheme_query: {e}")
         return f"Sorry, I encountered an error while processing your question: {str(e)}"
+
+
+def answer_scheme_query_stream(question: str) -> Iterator[str]:
+    """answer_scheme_query, yielding Gemini's text as it is generated
+
+    Errors propagate so the stream ends with an error event and the partial
+    answer is stored as incomplete (the same contract as diagnose_crop_stream).
+    """
+    ready, prompt, cache_key = prepare_scheme_answer(question)
+    if ready is not None:
+        yield ready
+        return
+
+    parts = []
+    for chunk in model.generate_content(prompt, stream=True):
+        text = chunk.text
+        if text:
+            parts.append(text)
+            yield text
+    get_answer_cache().put(cache_key, "".join(parts).strip())
@@ -0,0 +1,183 @@
+"""
+Scheme Passage Index
+--------------------
+Chunk-level retrieval over the full text of every scheme PDF.
+
+Each PDF is split into overlapping word windows tagged with the pages they
+span, and all passages go into one BM25 index (see ``scheme_index.Bm25``).
+The passages and postings are saved to ``data/scheme_passages.json`` so a
+restart only re-reads PDFs whose size or mtime changed.
+
+Main functions:
+    get_passage_index() -> PassageIndex
+        # Loaded (or rebuilt) index for the PDFs in PDF_DIR.
+    PassageIndex.search(query, top_k) -> list[dict]
+        # Passages: {"source_file", "page_start", "page_end", "text", "score"}
+
+Run ``python -m backend.tools.scheme_passages`` to rebuild the index by hand.
+"""
+
+import json
+import os
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+from backend.tools.scheme_index import Bm25, tokenize, top_scores
+
+PDF_DIR = Path(__file__).parent / "data" / "schemes"
+PASSAGE_INDEX_PATH = Path(__file__).parent / "data" / "scheme_passages.json"
+PASSAGE_WORDS = 180
+PASSAGE_OVERLAP = 40
+FILENAME_BOOST = 2.0  # per query term found in the passage's PDF file name
+INDEX_VERSION = 1
+
+
+def extract_pdf_pages(pdf_path: Path) -> List[Tuple[int, str]]:
+    """(1-based page number, text) for every page with meaningful text"""
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page_no, page in enumerate(doc, start=1):
+            page_text = page.get_text()
+            if len(page_text.strip()) > 50:
+                pages.append((page_no, page_text))
+    return pages
+
+
+def extract_pdf_text(pdf_path: Path) -> str:
+    """Full text of the meaningful pages (picklable, so it runs in a process pool)"""
+    return "".join(text + "\n" for _, text in extract_pdf_pages(pdf_path))
+
+
+def chunk_pages(pages: List[Tuple[int, str]], source_file: str,
+                size: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP) -> List[Dict]:
+    """Overlapping word windows across pages, tagged with the pages they span"""
+    words, word_pages = [], []
+    for page_no, text in pages:
+        page_words = text.split()
+        words.extend(page_words)
+        word_pages.extend([page_no] * len(page_words))
+
+    passages = []
+    step = max(1, size - overlap)
+    for start in range(0, len(words), step):
+        end = min(start + size, len(words))
+        passages.append({
+            "source_file": source_file,
+            "page_start": word_pages[start],
+            "page_end": word_pages[end - 1],
+            "text": " ".join(words[start:end]),
+        })
+        if end == len(words):
+            break
+    return passages
+
+
+def pdf_fingerprints(pdf_dir: Optional[Path] = None) -> Dict[str, List[float]]:
+    """{file name: [size, mtime]} for every PDF in the directory"""
+    pdf_dir = pdf_dir or PDF_DIR
+    fingerprints = {}
+    for pdf_file in sorted(pdf_dir.glob("*.pdf")):
+        stat = pdf_file.stat()
+        fingerprints[pdf_file.name] = [stat.st_size, stat.st_mtime]
+    return fingerprints
+
+
+class PassageIndex:
+    def __init__(self, passages: List[Dict], sources: Dict[str, List[float]], bm25: Optional[Bm25] = None):
+        self.passages = passages
+        self.sources = sources
+        self.bm25 = bm25 or Bm25([Counter(tokenize(p["text"])) for p in passages])
+        self._file_terms = {name: set(tokenize(name)) for name in sources}
+
+    def __len__(self) -> int:
+        return len(self.passages)
+
+    def search_ids(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """(passage_id, BM25 score) pairs, best first"""
+        terms = set(tokenize(query))
+        scores = self.bm25.score(terms)
+        for pid in scores:
+            file_terms = self._file_terms.get(self.passages[pid]["source_file"], ())
+            scores[pid] += FILENAME_BOOST * len(terms.intersection(file_terms))
+        return top_scores(scores, top_k)
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict]:
+        return [{**self.passages[pid], "score": round(score, 3)} for pid, score in self.search_ids(query, top_k)]
+
+    def save(self, path: Optional[Path] = None):
+        data = {
+            "version": INDEX_VERSION,
+            "sources": self.sources,
+            "passages": self.passages,
+            "postings": self.bm25.postings,
+            "lengths": self.bm25.lengths,
+        }
+        path = path or PASSAGE_INDEX_PATH
+        # Per-writer staging file: each worker builds the index on first use and may save concurrently
+        tmp = path.with_name(f".{path.name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["PassageIndex"]:
+        try:
+            with open(path or PASSAGE_INDEX_PATH, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data["passages"], data["sources"], Bm25.from_postings(data["postings"], data["lengths"]))
+
+
+def build_passage_index(pdf_dir: Optional[Path] = None, previous: Optional[PassageIndex] = None) -> PassageIndex:
+    """Index every PDF, reusing passages of files unchanged since ``previous``"""
+    pdf_dir = pdf_dir or PDF_DIR
+    sources = pdf_fingerprints(pdf_dir)
+    reused: Dict[str, List[Dict]] = {}
+    if previous is not None:
+        for passage in previous.passages:
+            name = passage["source_file"]
+            if previous.sources.get(name) == sources.get(name):
+                reused.setdefault(name, []).append(passage)
+
+    passages = []
+    for name in sources:
+        if name in reused:
+            passages.extend(reused[name])
+            continue
+        try:
+            file_passages = chunk_pages(extract_pdf_pages(pdf_dir / name), name)
+            print(f"📑 Indexed {len(file_passages)} passages from {name}")
+            passages.extend(file_passages)
+        except Exception as e:
+            print(f"❌ Error indexing {name}: {e}")
+    return PassageIndex(passages, sources)
+
+
+_passage_index: Optional[PassageIndex] = None
+
+
+def get_passage_index() -> PassageIndex:
+    """Current passage index, rebuilt (incrementally) when the PDFs change"""
+    global _passage_index
+    if _passage_index is None:
+        _passage_index = PassageIndex.load()
+
+    if _passage_index is None or _passage_index.sources != pdf_fingerprints():
+        _passage_index = build_passage_index(previous=_passage_index)
+        PASSAGE_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _passage_index.save()
+        print(f"💾 Saved passage index: {len(_passage_index)} passages")
+    return _passage_index
+
+
+if __name__ == "__main__":
+    _passage_index = build_passage_index()
+    _passage_index.save()
+    print(f"💾 Saved passage index: {len(_passage_index)} passages")
@@ -0,0 +1,209 @@
+"""
+Scheme Passage Vectors
+----------------------
+Offline semantic search over the scheme passages, fused with BM25 so
+paraphrased questions that share few exact keywords with a passage can still
+reach it.
+
+Passages are embedded with a hashing TF-IDF vectorizer (word unigrams and
+bigrams, sublinear tf) reduced by LSA (randomized truncated SVD, NumPy only).
+The result is a float32 matrix saved as ``.npy`` and memory-mapped at load;
+queries are projected the same way and scored by cosine similarity with one
+matrix product per batch. Each save writes a new version directory and then
+atomically replaces the ``CURRENT`` pointer file, so readers never mix arrays
+from two builds. No network, no GPU, no extra dependencies.
+
+Main functions:
+    get_vector_index(passage_index) -> VectorIndex | None
+        # Loaded (or rebuilt) embeddings for the current passage index.
+    VectorIndex.search(query, top_k) -> list[(passage_id, similarity)]
+    VectorIndex.search_many(queries, top_k)
+        # Same, batched.
+    reciprocal_rank_fusion(rankings, top_k) -> list[(passage_id, score)]
+        # Merges keyword (BM25) and vector rankings.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.tools.scheme_index import tokenize
+
+VECTOR_DIR = Path(__file__).parent / "data" / "scheme_vectors"
+HASH_DIM = 1 << 14
+LSA_COMPONENTS = 192
+BLOCK_ROWS = 1024  # passages densified at a time while building
+RANDOM_SEED = 13
+MIN_SIMILARITY = 0.2  # vector hits below this cosine are dropped
+RRF_K = 60
+INDEX_VERSION = 1
+VECTOR_ARRAYS = ("embeddings", "projection", "idf")
+KEEP_VERSIONS = 2  # the live one plus its predecessor, for workers still mapping it
+
+
+def hashed_features(text: str) -> Dict[int, float]:
+    """{bucket: sublinear tf} for word unigrams and bigrams (crc32 is stable across runs)"""
+    tokens = tokenize(text)
+    counts: Dict[int, float] = {}
+    for feature in tokens + [f"{a}_{b}" for a, b in zip(tokens, tokens[1:])]:
+        bucket = zlib.crc32(feature.encode("utf-8")) % HASH_DIM
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+    return {bucket: 1.0 + np.log(count) for bucket, count in counts.items()}
+
+
+def _dense_block(rows: List[Dict[int, float]], idf: np.ndarray) -> np.ndarray:
+    block = np.zeros((len(rows), HASH_DIM), dtype=np.float32)
+    for i, features in enumerate(rows):
+        if features:
+            block[i, list(features)] = list(features.values())
+    block *= idf
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    return block / np.maximum(norms, 1e-12)
+
+
+def _blocks(rows: List[Dict[int, float]], idf: np.ndarray):
+    for start in range(0, len(rows), BLOCK_ROWS):
+        yield start, _dense_block(rows[start:start + BLOCK_ROWS], idf)
+
+
+def passage_signature(passage_index) -> str:
+    """Identifies the passage set the embeddings were built from"""
+    payload = json.dumps([passage_index.sources, len(passage_index)], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class VectorIndex:
+    def __init__(self, embeddings: np.ndarray, projection: np.ndarray, idf: np.ndarray, signature: str = ""):
+        self.embeddings = embeddings    # (passages, components), rows L2-normalized
+        self.projection = projection    # (HASH_DIM, components)
+        self.idf = idf                  # (HASH_DIM,)
+        self.signature = signature
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    @classmethod
+    def build(cls, texts: List[str], components: int = LSA_COMPONENTS, signature: str = "") -> "VectorIndex":
+        rows = [hashed_features(text) for text in texts]
+        n = len(rows)
+        df = np.zeros(HASH_DIM, dtype=np.float64)
+        for features in rows:
+            df[list(features)] += 1
+        idf = np.log((1 + n) / (1 + df)).astype(np.float32) + 1.0
+
+        # Randomized truncated SVD: sample the range of X, then an exact SVD of the small projection
+        k = max(1, min(components, n - 1))
+        rng = np.random.default_rng(RANDOM_SEED)
+        omega = rng.standard_normal((HASH_DIM, k + 10)).astype(np.float32)
+        sample = np.zeros((n, k + 10), dtype=np.float32)
+        for start, block in _blocks(rows, idf):
+            sample[start:start + len(block)] = block @ omega
+        q, _ = np.linalg.qr(sample)
+        small = np.zeros((q.shape[1], HASH_DIM), dtype=np.float32)
+        for start, block in _blocks(rows, idf):
+            small += q[start:start + len(block)].T @ block
+        _, _, vt = np.linalg.svd(small, full_matrices=False)
+        projection = np.ascontiguousarray(vt[:k].T, dtype=np.float32)
+
+        embeddings = np.zeros((n, k), dtype=np.float32)
+        for start, block in _blocks(rows, idf):
+            embeddings[start:start + len(block)] = block @ projection
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return cls(embeddings, projection, idf, signature)
+
+    def embed(self, queries: List[str]) -> np.ndarray:
+        block = _dense_block([hashed_features(q) for q in queries], self.idf)
+        vectors = block @ self.projection
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    def search_many(self, queries: List[str], top_k: int = 5) -> List[List[Tuple[int, float]]]:
+        if not len(self) or not queries:
+            return [[] for _ in queries]
+        sims = self.embeddings @ self.embed(queries).T  # (passages, queries)
+        k = min(top_k, len(self))
+        results = []
+        for column in sims.T:
+            top = np.argpartition(-column, k - 1)[:k]
+            top = top[np.argsort(-column[top])]
+            results.append([(int(i), float(column[i])) for i in top if column[i] >= MIN_SIMILARITY])
+        return results
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        return self.search_many([query], top_k)[0]
+
+    def save(self, directory: Optional[Path] = None) -> Path:
+        """Write a new version under ``directory`` and atomically make it the current one"""
+        root = directory or VECTOR_DIR
+        root.mkdir(parents=True, exist_ok=True)
+        name = time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        staging = root / f".{name}.tmp"
+        staging.mkdir()
+        for array in VECTOR_ARRAYS:
+            np.save(staging / f"{array}.npy", getattr(self, array))
+        with open(staging / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "signature": self.signature,
+                       "hash_dim": HASH_DIM, "passages": len(self)}, f)
+        os.rename(staging, root / name)
+
+        # Readers resolve the pointer once, so they see all of one version or all of the other
+        pointer_tmp = root / f".CURRENT.{os.getpid()}.tmp"
+        pointer_tmp.write_text(name, encoding="utf-8")
+        os.replace(pointer_tmp, root / "CURRENT")
+        _prune_old_versions(root, keep=name)
+        return root / name
+
+    @classmethod
+    def load(cls, directory: Optional[Path] = None) -> Optional["VectorIndex"]:
+        root = directory or VECTOR_DIR
+        try:
+            path = root / (root / "CURRENT").read_text(encoding="utf-8").strip()
+            with open(path / "meta.json", "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION or meta.get("hash_dim") != HASH_DIM:
+                return None
+            arrays = {array: np.load(path / f"{array}.npy", mmap_mode="r") for array in VECTOR_ARRAYS}
+        except (FileNotFoundError, NotADirectoryError, ValueError, json.JSONDecodeError):
+            return None
+        return cls(signature=meta.get("signature", ""), **arrays)
+
+
+def _prune_old_versions(root: Path, keep: str):
+    versions = sorted(
+        (p for p in root.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    # Unlinked files stay valid for workers that still have them mapped
+    for old in versions[:-KEEP_VERSIONS]:
+        if old.name != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[int, float]]], top_k: int) -> List[Tuple[int, float]]:
+    """Sum of 1 / (RRF_K + rank) across rankings, best first"""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+
+def get_vector_index(passage_index) -> Optional[VectorIndex]:
+    """Embeddings matching ``passage_index``: memory-mapped from disk, rebuilt if stale"""
+    if passage_index is None or not len(passage_index):
+        return None
+    signature = passage_signature(passage_index)
+    index = VectorIndex.load()
+    if index is None or index.signature != signature:
+        print(f"🧮 Embedding {len(passage_index)} scheme passages...")
+        index = VectorIndex.build([p["text"] for p in passage_index.passages], signature=signature)
+        index.save()
+        index = VectorIndex.load() or index
+    return index
@@ -0,0 +1,164 @@
+"""
+Translation Service
+-------------------
+Sarvam translation behind a memo cache and a shared rate limit.
+
+- Calls go through the voice gateway: one pooled client per process, the
+  ``translate`` bulkhead and retries of transient failures.
+- Translations are memoized on (text, source, target), so repeated answers and
+  repeated chunks cost nothing.
+- Long texts are split into chunks that are translated concurrently; the
+  process-wide token bucket paces them instead of a fixed sleep per chunk.
+- Testable against a local stand-in of the Sarvam API via ``SARVAM_BASE_URL``,
+  or by passing a ``VoiceGateway`` built around any client.
+
+Main functions:
+    get_translation_service() -> TranslationService
+        # .translate(text, src, tgt) -> str
+        # .translate_many(texts, src, tgt) -> list[str]  (concurrent, ordered)
+        # .translate_long(text, src, tgt, max_length) -> str
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from backend.tools.metrics import get_metrics
+from backend.tools.rate_limiter import get_rate_limiter
+from backend.tools.voice_gateway import NO_SDK_RETRIES, VoiceGateway, get_voice_gateway
+
+TRANSLATE_RATE_PER_S = float(os.getenv("SARVAM_TRANSLATE_RATE_PER_S", 2))
+TRANSLATE_BURST = float(os.getenv("SARVAM_TRANSLATE_BURST", 4))
+TRANSLATE_MAX_CONCURRENCY = int(os.getenv("TRANSLATE_MAX_CONCURRENCY", 4))
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 4096))
+
+metrics = get_metrics("translation")
+
+
+def normalize_lang_code(lang):
+    # Accepts 'en', 'hi', 'te', 'kn', 'en-IN', etc. Returns BCP-47 code.
+    mapping = {
+        'en': 'en-IN', 'hi': 'hi-IN', 'te': 'te-IN', 'kn': 'kn-IN',
+        'en-IN': 'en-IN', 'hi-IN': 'hi-IN', 'te-IN': 'te-IN', 'kn-IN': 'kn-IN'
+    }
+    return mapping.get(lang, lang)
+
+
+def extract_translated_string(translated):
+    # Convert to dict if it's a Pydantic model or custom object
+    if hasattr(translated, 'dict'):
+        translated = translated.dict()
+    elif hasattr(translated, '__dict__'):
+        translated = vars(translated)
+    # Recursively extract the innermost translated_text string
+    while isinstance(translated, dict) and "translated_text" in translated:
+        translated = translated["translated_text"]
+        # If it's still a custom object, convert again
+        if hasattr(translated, 'dict'):
+            translated = translated.dict()
+        elif hasattr(translated, '__dict__'):
+            translated = vars(translated)
+    return translated
+
+
+def chunk_text(text, max_length=500):
+    # Split text into <=max_length character chunks, preserving word boundaries
+    words = text.split()
+    chunks = []
+    current = ""
+    for word in words:
+        if len(current) + len(word) + 1 > max_length:
+            if current:
+                chunks.append(current)
+            current = word
+        else:
+            if current:
+                current += " "
+            current += word
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TranslationService:
+    def __init__(self, gateway: Optional[VoiceGateway] = None, cache_size: int = TRANSLATION_CACHE_SIZE):
+        self._gateway = gateway
+        self._cache: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_lock = threading.Lock()
+        self._limiter = get_rate_limiter("sarvam_translate", TRANSLATE_RATE_PER_S, TRANSLATE_BURST)
+        self._pool = ThreadPoolExecutor(max_workers=TRANSLATE_MAX_CONCURRENCY, thread_name_prefix="translate")
+
+    @property
+    def gateway(self) -> VoiceGateway:
+        return self._gateway or get_voice_gateway()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def _cache_put(self, key, value: str):
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def translate(self, text: str, source_lang: str = "en", target_lang: str = "hi") -> str:
+        """Translate one piece of text (at most ~1000 chars, the upstream limit)"""
+        if not text or not text.strip():
+            return text
+        source, target = normalize_lang_code(source_lang), normalize_lang_code(target_lang)
+        key = (" ".join(text.split()), source, target)
+        cached = self._cache_get(key)
+        if cached is not None:
+            metrics.incr("hits")
+            return cached
+        metrics.incr("misses")
+
+        with metrics.timer("upstream"):
+            result = self.gateway.call("translate", lambda client: client.text.translate(
+                input=text,
+                source_language_code=source,
+                target_language_code=target,
+                request_options=NO_SDK_RETRIES
+            ), limiter=self._limiter)
+        translated = result["text"] if isinstance(result, dict) and "text" in result else result
+        translated = str(extract_translated_string(translated))
+        self._cache_put(key, translated)
+        return translated
+
+    def translate_many(self, texts: List[str], source_lang: str = "en", target_lang: str = "hi") -> List[str]:
+        """Translate ``texts`` concurrently (duplicates once); results in input order"""
+        unique = list(dict.fromkeys(texts))
+        if len(unique) <= 1:
+            return [self.translate(text, source_lang, target_lang) for text in texts]
+        futures = {text: self._pool.submit(self.translate, text, source_lang, target_lang) for text in unique}
+        try:
+            done = {text: future.result() for text, future in futures.items()}
+        finally:
+            for future in futures.values():
+                future.cancel()
+        return [done[text] for text in texts]
+
+    def translate_long(self, text: str, source_lang: str = "en", target_lang: str = "hi", max_length: int = 1000) -> str:
+        chunks = chunk_text(text, max_length)
+        print(f"Translating {len(chunks)} chunk(s), {len(text)} chars, {source_lang} -> {target_lang}")
+        return " ".join(self.translate_many(chunks, source_lang, target_lang))
+
+
+_translation_service: Optional[TranslationService] = None
+_translation_service_lock = threading.Lock()
+
+
+def get_translation_service() -> TranslationService:
+    global _translation_service
+    with _translation_service_lock:
+        if _translation_service is None:
+            _translation_service = TranslationService()
+        return _translation_service
@@ -0,0 +1,147 @@
+"""
+TTS Audio Cache
+---------------
+Content-addressed on-disk cache of synthesized speech, one entry per TTS
+chunk, so answers that share text (a popular scheme answer, a standard tip)
+reuse audio even when only part of the text overlaps.
+
+Entries are keyed by SHA-256 of (normalized chunk text, language, speaker,
+model) and stored as ``<dir>/<key[:2]>/<key>.wav``. Total size is capped at
+``TTS_CACHE_MAX_BYTES``; the least recently used entries are evicted first.
+The directory is shared by every worker: entries written by another process
+are found on disk and adopted into this process's LRU.
+Hits, misses, hit ratio and upstream bytes saved are reported by ``stats()``.
+
+Main function:
+    get_tts_cache() -> AudioCache
+        # .key(text, language, speaker, model), .get(key), .put(key, audio)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.tools.metrics import get_metrics
+
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", Path(__file__).parent / "data" / "tts_cache"))
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+metrics = get_metrics("tts_cache")
+
+
+class AudioCache:
+    def __init__(self, directory: Path = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self._scan()
+
+    def _scan(self):
+        """Rebuild the LRU order from disk (last access time, oldest first)"""
+        files = []
+        for path in self.directory.glob("*/*.wav"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((max(stat.st_atime, stat.st_mtime), path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def key(text: str, language: str, speaker: str, model: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256("\x1f".join((normalized, language, speaker, model)).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.wav"
+
+    def get(self, key: str) -> Optional[bytes]:
+        # Not checked against _entries first: other workers write to the same directory
+        try:
+            path = self._path(key)
+            audio = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total_bytes -= self._entries.pop(key, 0)
+            metrics.incr("misses")
+            return None
+        except OSError as e:
+            # The cache is an optimization: an unreadable volume means a miss, not a failed request
+            print(f"⚠️ TTS cache read failed: {e}")
+            metrics.incr("misses")
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Written by another worker: adopt it so this process's size cap counts it
+                self._entries[key] = len(audio)
+                self._total_bytes += len(audio)
+        metrics.incr("hits")
+        metrics.incr("bytes_saved", len(audio))
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            # Disk full or read-only volume: the audio was already paid for, so just don't cache it
+            print(f"⚠️ TTS cache write failed: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+
+        evicted = []
+        with self._lock:
+            self._total_bytes += len(audio) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            while self._total_bytes > self.max_bytes and self._entries:
+                old_key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+        metrics.incr("stores")
+        metrics.incr("evictions", len(evicted))
+
+    def stats(self) -> Dict:
+        counters = metrics.snapshot()["counters"]
+        lookups = counters.get("hits", 0) + counters.get("misses", 0)
+        return {
+            **counters,
+            "hit_ratio": round(counters.get("hits", 0) / lookups, 3) if lookups else None,
+            "entries": len(self._entries),
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_tts_cache: Optional[AudioCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> AudioCache:
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = AudioCache()
+        return _tts_cache
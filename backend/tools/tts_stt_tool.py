@@ -9,8 +9,9 @@ Main functions:
         # Converts audio bytes to text in the specified language.
     synthesize_speech(text: str, language: str) -> bytes
         # Converts text to speech audio in the specified language.
+    synthesize_speech_stream(text: str, language: str) -> (bytes, Iterator[bytes], str)
+        # Same audio as a WAV header plus PCM chunks, streamed as each chunk is synthesized.
 """
-from sarvamai import SarvamAI
 import os
 import base64
 from pydub import AudioSegment
@@ -18,170 +19,161 @@ from pydub.utils import which
 from pathlib import Path
 AudioSegment.converter = os.getenv("FFMPEG_PATH")#"/usr/local/bin/ffmpeg"
 import io
-import time
-from tempfile import NamedTemporaryFile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
-# Create temp directory in your project
-TMP_DIR = Path(__file__).parent.parent / "tmp"
-TMP_DIR.mkdir(exist_ok=True)
+from backend.tools.audio_utils import pcm_to_wav, vad_chunks, wav_header, wav_to_pcm16
+from backend.tools.metrics import get_metrics
+from backend.tools.rate_limiter import get_rate_limiter
+from backend.tools.translation_service import chunk_text, get_translation_service, normalize_lang_code
+from backend.tools.tts_cache import get_tts_cache
+from backend.tools.voice_gateway import NO_SDK_RETRIES, get_voice_gateway
+
+# Shared across all requests in the process: chunks run concurrently, the bucket sets the pace
+TTS_RATE_PER_S = float(os.getenv("SARVAM_TTS_RATE_PER_S", 2))
+TTS_BURST = float(os.getenv("SARVAM_TTS_BURST", 4))
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", 4))
+tts_limiter = get_rate_limiter("sarvam_tts", TTS_RATE_PER_S, TTS_BURST)
+tts_pool = ThreadPoolExecutor(max_workers=TTS_MAX_CONCURRENCY, thread_name_prefix="tts")
+TTS_MODEL = "bulbul:v2"
+TTS_SPEAKER = "anushka"
+TTS_DEBUG_DIR = os.getenv("TTS_DEBUG_DIR")  # set to write each chunk as debug_chunk_N.wav there
+
+# Output format for all synthesized audio (and the PCM sent to STT)
+TARGET_SAMPLE_RATE = 16000
+TARGET_CHANNELS = 1
+TARGET_SAMPLE_WIDTH = 2  # 2 bytes = 16 bits
+
+# Speech-to-text: uploads are decoded and chunked in memory, chunks transcribed concurrently
+STT_MODEL = "saarika:v2.5"
+STT_MAX_CHUNK_MS = 29000  # upstream limit is 30s per request
+STT_RATE_PER_S = float(os.getenv("SARVAM_STT_RATE_PER_S", 2))
+STT_BURST = float(os.getenv("SARVAM_STT_BURST", 4))
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", 4))
+stt_limiter = get_rate_limiter("sarvam_stt", STT_RATE_PER_S, STT_BURST)
+stt_pool = ThreadPoolExecutor(max_workers=STT_MAX_CONCURRENCY, thread_name_prefix="stt")
+stt_metrics = get_metrics("stt")
+
+def decode_upload(audio_bytes):
+    """AudioSegment from uploaded bytes; WAV is parsed directly, anything else is piped through ffmpeg"""
+    fmt = "wav" if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE" else None
+    return AudioSegment.from_file(io.BytesIO(audio_bytes), format=fmt)
+
+def transcript_text(response):
+    # Extract text from response
+    if hasattr(response, "text") and response.text:
+        return str(response.text)
+    elif hasattr(response, "transcript") and response.transcript:
+        return str(response.transcript)
+    elif hasattr(response, "translated_text"):
+        # Handle TranslationResponse objects
+        return str(response.translated_text)
+    return str(response)
+
+def transcribe_chunk(wav_bytes, language, name="audio.wav"):
+    """One rate-limited STT call (via the voice gateway) on in-memory WAV bytes; returns the transcript text"""
+    response = get_voice_gateway().call("stt", lambda client: client.speech_to_text.transcribe(
+        file=(name, wav_bytes, "audio/wav"),
+        model=STT_MODEL,
+        language_code=language,
+        request_options=NO_SDK_RETRIES
+    ), limiter=stt_limiter)
+    return transcript_text(response)
+
+def to_english(texts):
+    # Detect text containing non-ASCII characters (likely non-English); translate those together
+    foreign = [t for t in texts if any(ord(char) > 127 for char in t)]
+    for t in foreign:
+        print(f"Detected non-English text, translating to English: {t[:100]}...")
+    service = get_translation_service()
+    try:
+        translated = dict(zip(foreign, service.translate_many(foreign, "auto", "en")))
+    except Exception as e:
+        # One failed chunk shouldn't lose the whole transcript: retry one by one (successes are
+        # memoized) and keep the untranslated transcript for the ones that still fail
+        print(f"⚠️ Translation to English failed ({e}); translating chunks individually")
+        translated = {}
+        for t in foreign:
+            try:
+                translated[t] = service.translate(t, "auto", "en")
+            except Exception as e:
+                print(f"⚠️ Keeping untranslated transcript: {e}")
+    return [translated.get(t, t) for t in texts]
 
 def transcribe_audio(audio_bytes, language="unknown"):
     api_key = os.getenv("SARVAM_API_KEY")
     if not api_key:
         raise ValueError("SARVAM_API_KEY not set in environment variables")
-    client = SarvamAI(api_subscription_key=api_key)
-    # Save audio_bytes to a temp file (Sarvam SDK expects a file object)
-    with NamedTemporaryFile(suffix=".wav", dir=TMP_DIR, delete=False) as tmp:
-        tmp.write(audio_bytes)
-        tmp.flush()
-        tmp.close()
-
-        def process_response(response):
-            # Extract text from response
-            if hasattr(response, "text") and response.text:
-                text = str(response.text)
-            elif hasattr(response, "transcript") and response.transcript:
-                text = str(response.transcript)
-            elif hasattr(response, "translated_text"):
-                # Handle TranslationResponse objects
-                text = str(response.translated_text)
-            else:
-                text = str(response)
-                
-            # Detect if text contains non-ASCII characters (likely non-English)
-            if any(ord(char) > 127 for char in text):
-                print(f"Detected non-English text, translating to English: {text[:100]}...")
-                # Translate to English (using your existing translate_text function)
-                translated = translate_text(text, source_lang="auto", target_lang="en")
-                # Extract string from translation response
-                if hasattr(translated, "translated_text"):
-                    text = str(translated.translated_text)
-                else:
-                    text = str(translated)
-                
-            return text
 
+    audio = decode_upload(audio_bytes)
+    if audio.duration_seconds <= 30:
+        return to_english([transcribe_chunk(audio_bytes, language)])[0]
+
+    # Drop silence and pack speech into <=29s chunks cut at pauses (plain <=29s
+    # chunks if VAD finds too little speech), then transcribe them concurrently
+    # and reassemble in order
+    audio = audio.set_channels(TARGET_CHANNELS).set_sample_width(TARGET_SAMPLE_WIDTH).set_frame_rate(TARGET_SAMPLE_RATE)
+    samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+    pieces = vad_chunks(samples, TARGET_SAMPLE_RATE, STT_MAX_CHUNK_MS)
+    speech_sec = sum(len(piece) for piece in pieces) / TARGET_SAMPLE_RATE
+    print(f"🎙️ VAD: {audio.duration_seconds:.1f}s of audio -> {len(pieces)} chunk(s), {speech_sec:.1f}s of speech")
+    stt_metrics.incr("audio_seconds", audio.duration_seconds)
+    stt_metrics.incr("uploaded_seconds", speech_sec)
+    stt_metrics.incr("chunks", len(pieces))
+    chunks = [wav_header(TARGET_SAMPLE_RATE, TARGET_CHANNELS, TARGET_SAMPLE_WIDTH, piece.nbytes) + piece.tobytes()
+              for piece in pieces]
+    futures = [stt_pool.submit(transcribe_chunk, chunk, language, f"chunk_{i+1}.wav")
+               for i, chunk in enumerate(chunks)]
+    full_transcript = []
+    for idx, future in enumerate(futures):
         try:
-            # Check audio duration using pydub
-            audio = AudioSegment.from_file(tmp.name)
-            duration_sec = audio.duration_seconds
-            if duration_sec <= 30:
-                with open(tmp.name, "rb") as audio_file:
-                    response = client.speech_to_text.transcribe(
-                        file=audio_file,
-                        model="saarika:v2.5",
-                        language_code=language
-                    )
-                if hasattr(response, "text") and response.text:
-                    return process_response(response.text)
-                elif hasattr(response, "transcript") and response.transcript:
-                    return process_response(response.transcript)
-                else:
-                    return process_response(response)
-            else:
-                # Split audio into <=29s chunks and transcribe each
-                chunks = []
-                for i, chunk in enumerate(audio[::29000]):  # 29s chunks (29000ms)
-                    chunk_file = NamedTemporaryFile(suffix=".wav", delete=False)
-                    chunk.export(chunk_file.name, format="wav")
-                    chunks.append(chunk_file.name)
-                full_transcript = []
-                for idx, chunk_path in enumerate(chunks):
-                    with open(chunk_path, "rb") as audio_file:
-                        try:
-                            response = client.speech_to_text.transcribe(
-                                file=audio_file,
-                                model="saarika:v2.5",
-                                language_code=language
-                            )
-                            if hasattr(response, "text") and response.text:
-                                full_transcript.append(process_response(response.text))
-                            elif hasattr(response, "transcript") and response.transcript:
-                                full_transcript.append(process_response(response.transcript))
-                            else:
-                                full_transcript.append(process_response(response))
-                        except Exception as e:
-                            print(f"Error with chunk {chunk_path}: {e}")
-                return " ".join(full_transcript).strip()
-        finally:
-            # Clean up temp file
-            if os.path.exists(tmp.name):
-                os.remove(tmp.name)
-
-
-def normalize_lang_code(lang):
-    # Accepts 'en', 'hi', 'te', 'kn', 'en-IN', etc. Returns BCP-47 code.
-    mapping = {
-        'en': 'en-IN', 'hi': 'hi-IN', 'te': 'te-IN', 'kn': 'kn-IN',
-        'en-IN': 'en-IN', 'hi-IN': 'hi-IN', 'te-IN': 'te-IN', 'kn-IN': 'kn-IN'
-    }
-    return mapping.get(lang, lang)
+            full_transcript.append(future.result())
+        except Exception as e:
+            print(f"Error with chunk {idx+1}/{len(futures)}: {e}")
+    return " ".join(to_english(full_transcript)).strip()
+
 
 def translate_text(text, source_lang="en", target_lang="hi"):
-    api_key = os.getenv("SARVAM_API_KEY")
-    if not api_key:
-        raise ValueError("SARVAM_API_KEY not set in environment variables")
-    client = SarvamAI(api_subscription_key=api_key)
-    source_lang_code = normalize_lang_code(source_lang)
-    target_lang_code = normalize_lang_code(target_lang)
-    result = client.text.translate(
-        input=text,
-        source_language_code=source_lang_code,
-        target_language_code=target_lang_code
-    )
-    return result["text"] if isinstance(result, dict) and "text" in result else result
-
-def extract_translated_string(translated):
-    # Convert to dict if it's a Pydantic model or custom object
-    if hasattr(translated, 'dict'):
-        translated = translated.dict()
-    elif hasattr(translated, '__dict__'):
-        translated = vars(translated)
-    # Recursively extract the innermost translated_text string
-    while isinstance(translated, dict) and "translated_text" in translated:
-        translated = translated["translated_text"]
-        # If it's still a custom object, convert again
-        if hasattr(translated, 'dict'):
-            translated = translated.dict()
-        elif hasattr(translated, '__dict__'):
-            translated = vars(translated)
-    return translated
-
-def chunk_text(text, max_length=500):
-    # Split text into <=max_length character chunks, preserving word boundaries
-    words = text.split()
-    chunks = []
-    current = ""
-    for word in words:
-        if len(current) + len(word) + 1 > max_length:
-            if current:
-                chunks.append(current)
-            current = word
-        else:
-            if current:
-                current += " "
-            current += word
-    if current:
-        chunks.append(current)
-    return chunks
+    return get_translation_service().translate(text, source_lang, target_lang)
 
 def translate_long_text(text, source_lang="en", target_lang="hi", max_length=1000):
-    chunks = chunk_text(text, max_length)
-    translated_chunks = []
-    for i, chunk in enumerate(chunks):
-        print(f"Translating chunk {i+1}/{len(chunks)}: {repr(chunk[:60])}... ({len(chunk)} chars)")
-        translated = translate_text(chunk, source_lang, target_lang)
-        translated_chunks.append(extract_translated_string(translated))
-        time.sleep(1)  # To avoid rate limiting
-    return " ".join(translated_chunks)
+    return get_translation_service().translate_long(text, source_lang, target_lang, max_length)
 
 # Update synthesize_speech to use translate_long_text for long inputs
 
-def synthesize_speech(response_text, language="en-IN", translate=False, source_lang="en", target_lang=None):
-    api_key = os.getenv("SARVAM_API_KEY")
-    if not api_key:
-        raise ValueError("SARVAM_API_KEY not set in environment variables")
-    client = SarvamAI(api_subscription_key=api_key)
+def decode_audio_data(audio_data):
+    if isinstance(audio_data, bytes):
+        return audio_data
+    elif isinstance(audio_data, str) and os.path.isfile(audio_data):
+        with open(audio_data, "rb") as f:
+            return f.read()
+    else:
+        try:
+            return base64.b64decode(audio_data)
+        except Exception as e:
+            raise TypeError(f"audio_data is neither bytes, a valid file path, nor valid base64: {type(audio_data)}")
+
+def synthesize_chunk(chunk, language):
+    """One TTS chunk's WAV bytes: from the audio cache, else one rate-limited TTS call via the voice gateway"""
+    language = normalize_lang_code(language)
+    cache = get_tts_cache()
+    key = cache.key(chunk, language, TTS_SPEAKER, TTS_MODEL)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    audio_response = get_voice_gateway().call("tts", lambda client: client.text_to_speech.convert(
+        target_language_code=language,
+        text=chunk,
+        model=TTS_MODEL,
+        speaker=TTS_SPEAKER,
+        request_options=NO_SDK_RETRIES
+    ), limiter=tts_limiter)
+    audio_bytes = decode_audio_data(audio_response.audios[0])
+    cache.put(key, audio_bytes)
+    return audio_bytes
+
+def prepare_tts_text(response_text, language="en-IN", translate=False, source_lang="en", target_lang=None):
+    """(text_chunks, language, translated_text, response_text) for a TTS request"""
     translated_text = None
     if translate and target_lang:
         translated_text = translate_long_text(response_text, source_lang=source_lang, target_lang=target_lang)
@@ -191,53 +183,77 @@ def synthesize_speech(response_text, language="en-IN", translate=False, source_l
     if not isinstance(response_text, str):
         response_text = str(response_text)
     # Chunk text for TTS
-    text_chunks = chunk_text(response_text, 500)
-    audio_segments = []
-    # Set your desired output parameters
-    TARGET_SAMPLE_RATE = 16000
-    TARGET_CHANNELS = 1
-    TARGET_SAMPLE_WIDTH = 2  # 2 bytes = 16 bits
-
-    for i, chunk in enumerate(text_chunks):
-        print(f"Chunk {i+1}/{len(text_chunks)}: {repr(chunk[:60])}... ({len(chunk)} chars)")
-        audio_response = client.text_to_speech.convert(
-            target_language_code=normalize_lang_code(language),
-            text=chunk,
-            model="bulbul:v2",
-            speaker="anushka"
-        )
-        print(f"  TTS API response for chunk {i+1}: {audio_response}")
-        audio_data = audio_response.audios[0]
-        if isinstance(audio_data, bytes):
-            audio_bytes = audio_data
-        elif isinstance(audio_data, str) and os.path.isfile(audio_data):
-            with open(audio_data, "rb") as f:
-                audio_bytes = f.read()
-        else:
-            try:
-                audio_bytes = base64.b64decode(audio_data)
-            except Exception as e:
-                raise TypeError(f"audio_data is neither bytes, a valid file path, nor valid base64: {type(audio_data)}")
-        print(f"  Chunk {i+1} audio_bytes length: {len(audio_bytes)}")
-        seg = AudioSegment.from_file(io.BytesIO(audio_bytes), format="wav")
-        seg = seg.set_frame_rate(TARGET_SAMPLE_RATE).set_channels(TARGET_CHANNELS).set_sample_width(TARGET_SAMPLE_WIDTH)
-        print(f"  Audio segment {i+1} duration: {seg.duration_seconds:.2f}s, frame_rate: {seg.frame_rate}, channels: {seg.channels}, sample_width: {seg.sample_width}")
-        seg.export(f"debug_chunk_{i+1}.wav", format="wav")
-        print(f"  Saved debug_chunk_{i+1}.wav")
-        audio_segments.append(seg)
-        time.sleep(5)  # Add a 5-second delay between requests (increased from 1s)
-    # Concatenate all audio segments
-    if audio_segments:
-        combined = audio_segments[0]
-        for seg in audio_segments[1:]:
-            combined += seg
-        print(f"Total concatenated audio duration: {combined.duration_seconds:.2f} seconds")
-        out_io = io.BytesIO()
-        combined.export(out_io, format="wav")
-        out_io.seek(0)
-        final_audio = out_io.read()
+    return chunk_text(response_text, 500), language, translated_text, response_text
+
+def write_debug_chunk(i, pcm):
+    if not TTS_DEBUG_DIR:
+        return
+    path = Path(TTS_DEBUG_DIR) / f"debug_chunk_{i}.wav"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pcm_to_wav([pcm], TARGET_SAMPLE_RATE, TARGET_CHANNELS, TARGET_SAMPLE_WIDTH))
+    print(f"  Saved {path}")
+
+def synthesize_pcm(text_chunks, language):
+    """Yield each chunk's raw PCM (16 kHz mono 16-bit) in order, as soon as it is ready"""
+    api_key = os.getenv("SARVAM_API_KEY")
+    if not api_key:
+        raise ValueError("SARVAM_API_KEY not set in environment variables")
+
+    # All chunks are requested at once; the shared token bucket paces them and
+    # results are collected in order
+    futures = [tts_pool.submit(synthesize_chunk, chunk, language) for chunk in text_chunks]
+    try:
+        for i, (chunk, future) in enumerate(zip(text_chunks, futures)):
+            print(f"Chunk {i+1}/{len(text_chunks)}: {repr(chunk[:60])}... ({len(chunk)} chars)")
+            audio_bytes = future.result()
+            # Parsed straight from the WAV header; only resampled/downmixed if the format differs
+            pcm = wav_to_pcm16(audio_bytes, TARGET_SAMPLE_RATE, TARGET_CHANNELS)
+            duration = len(pcm) / (TARGET_SAMPLE_RATE * TARGET_CHANNELS * TARGET_SAMPLE_WIDTH)
+            print(f"  Chunk {i+1}: {len(audio_bytes)} bytes -> {duration:.2f}s of PCM")
+            write_debug_chunk(i + 1, pcm)
+            yield pcm
+    finally:
+        # A client that stopped listening shouldn't keep spending upstream quota
+        for future in futures:
+            future.cancel()
+
+def synthesize_speech(response_text, language="en-IN", translate=False, source_lang="en", target_lang=None):
+    text_chunks, language, translated_text, response_text = prepare_tts_text(
+        response_text, language, translate, source_lang, target_lang
+    )
+    pcm_chunks = list(synthesize_pcm(text_chunks, language))
+    # One header, all chunks copied once into a preallocated buffer
+    if pcm_chunks:
+        final_audio = pcm_to_wav(pcm_chunks, TARGET_SAMPLE_RATE, TARGET_CHANNELS, TARGET_SAMPLE_WIDTH)
+        duration = (len(final_audio) - 44) / (TARGET_SAMPLE_RATE * TARGET_CHANNELS * TARGET_SAMPLE_WIDTH)
+        print(f"Total concatenated audio duration: {duration:.2f} seconds")
     else:
         final_audio = b""
     return {"audio": final_audio, "translated_text": translated_text, "response_text": response_text}
 
+def synthesize_speech_stream(response_text, language="en-IN", translate=False, source_lang="en", target_lang=None):
+    """Progressive TTS: returns (header, pcm_chunks, translated_text).
+
+    ``header`` is a streaming WAV header (unknown length) and ``pcm_chunks``
+    yields raw 16 kHz mono 16-bit PCM per text chunk as soon as it is synthesized.
+    """
+    text_chunks, language, translated_text, _ = prepare_tts_text(
+        response_text, language, translate, source_lang, target_lang
+    )
+    header = wav_header(TARGET_SAMPLE_RATE, TARGET_CHANNELS, TARGET_SAMPLE_WIDTH)
+    pcm_chunks = synthesize_pcm(text_chunks, language)
+    # Start eagerly: a missing key or a failed first chunk must raise here, while the
+    # endpoint can still answer with an error status instead of a truncated 200 stream
+    try:
+        first = next(pcm_chunks)
+    except StopIteration:
+        return header, iter(()), translated_text
+    return header, _resume(first, pcm_chunks), translated_text
 
+def _resume(first, rest):
+    """``first`` then the rest of the ``rest`` generator, closing it if the consumer stops early"""
+    try:
+        yield first
+        yield from rest
+    finally:
+        rest.close()
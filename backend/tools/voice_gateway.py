@@ -0,0 +1,162 @@
+"""
+Voice Upstream Gateway
+----------------------
+Single way out to the Sarvam voice APIs (speech-to-text, text-to-speech,
+translation) for the whole process.
+
+- One long-lived ``SarvamAI`` client with a keep-alive connection pool, so
+  calls reuse connections instead of paying connection and TLS setup each time.
+- A bulkhead per upstream: at most N calls in flight to each of ``stt``,
+  ``tts`` and ``translate``, so a slow upstream can't take every worker with
+  it. Time spent queueing for a slot is recorded per upstream.
+- Idempotent calls are retried on connection errors, timeouts, 408/429 and
+  5xx with exponential backoff and full jitter (Retry-After is honoured).
+  The SDK's own retries are turned off so only the gateway retries.
+- ``SARVAM_BASE_URL`` points the client at a local stand-in of the Sarvam API.
+
+Metrics (namespace ``voice_gateway``): ``<upstream>.queue``, ``<upstream>.call``,
+``<upstream>.retries``, ``<upstream>.errors``, ``<upstream>.rejected``.
+
+Main functions:
+    get_voice_gateway() -> VoiceGateway
+        # .call(upstream, fn, limiter=None, idempotent=True) -> fn(client)
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+
+import httpx
+from sarvamai import SarvamAI
+from sarvamai.core.api_error import ApiError
+from sarvamai.environment import SarvamAIEnvironment
+
+from backend.tools.metrics import get_metrics
+
+SARVAM_BASE_URL = os.getenv("SARVAM_BASE_URL")  # e.g. http://127.0.0.1:8081 for a local stand-in
+SARVAM_TIMEOUT_S = float(os.getenv("SARVAM_TIMEOUT_S", 60))
+# Max concurrent calls per upstream (bulkheads)
+VOICE_BULKHEADS = {
+    "stt": int(os.getenv("VOICE_STT_MAX_INFLIGHT", 4)),
+    "tts": int(os.getenv("VOICE_TTS_MAX_INFLIGHT", 4)),
+    "translate": int(os.getenv("VOICE_TRANSLATE_MAX_INFLIGHT", 4)),
+}
+VOICE_QUEUE_TIMEOUT_S = float(os.getenv("VOICE_QUEUE_TIMEOUT_S", 30))
+VOICE_MAX_RETRIES = int(os.getenv("VOICE_MAX_RETRIES", 2))
+VOICE_RETRY_BASE_S = 0.5
+VOICE_RETRY_MAX_S = 8.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Pass as request_options= on SDK calls so retries happen here, under the bulkhead and rate limit
+NO_SDK_RETRIES = {"max_retries": 0}
+
+metrics = get_metrics("voice_gateway")
+T = TypeVar("T")
+
+
+class BulkheadFull(RuntimeError):
+    pass
+
+
+def create_sarvam_client(base_url: Optional[str] = None, max_connections: int = sum(VOICE_BULKHEADS.values())) -> SarvamAI:
+    """A SarvamAI client with a keep-alive connection pool, optionally aimed at ``base_url``"""
+    api_key = os.getenv("SARVAM_API_KEY")
+    if not api_key:
+        raise ValueError("SARVAM_API_KEY not set in environment variables")
+    kwargs = {}
+    if base_url:
+        base_url = base_url.rstrip("/")
+        ws_url = "ws" + base_url[len("http"):] if base_url.startswith("http") else base_url
+        kwargs["environment"] = SarvamAIEnvironment(base=base_url, creative=f"{base_url}/dubbing", production=ws_url)
+    http_client = httpx.Client(
+        timeout=SARVAM_TIMEOUT_S,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+    return SarvamAI(api_subscription_key=api_key, httpx_client=http_client, **kwargs)
+
+
+def retry_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying after ``error`` (None = not retryable)"""
+    if isinstance(error, ApiError):
+        if error.status_code not in RETRYABLE_STATUS:
+            return None
+        retry_after = (error.headers or {}).get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), VOICE_RETRY_MAX_S)
+            except ValueError:
+                pass
+    elif not isinstance(error, (httpx.TransportError, httpx.TimeoutException)):
+        return None
+    return random.uniform(0, min(VOICE_RETRY_MAX_S, VOICE_RETRY_BASE_S * 2 ** attempt))
+
+
+class VoiceGateway:
+    def __init__(self, client: Optional[SarvamAI] = None, base_url: Optional[str] = SARVAM_BASE_URL):
+        self._client = client
+        self._base_url = base_url
+        self._client_lock = threading.Lock()
+        self._bulkheads: Dict[str, threading.BoundedSemaphore] = {
+            upstream: threading.BoundedSemaphore(limit) for upstream, limit in VOICE_BULKHEADS.items()
+        }
+
+    @property
+    def client(self) -> SarvamAI:
+        with self._client_lock:
+            if self._client is None:
+                self._client = create_sarvam_client(self._base_url)
+            return self._client
+
+    @contextmanager
+    def bulkhead(self, upstream: str):
+        semaphore = self._bulkheads[upstream]
+        start = time.perf_counter()
+        if not semaphore.acquire(timeout=VOICE_QUEUE_TIMEOUT_S):
+            metrics.incr(f"{upstream}.rejected")
+            raise BulkheadFull(f"{upstream}: no free upstream slot after {VOICE_QUEUE_TIMEOUT_S:.0f}s")
+        metrics.observe(f"{upstream}.queue", time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def call(self, upstream: str, fn: Callable[[SarvamAI], T], limiter=None, idempotent: bool = True) -> T:
+        """Run ``fn(client)`` inside ``upstream``'s bulkhead, retrying idempotent calls on transient errors.
+
+        ``limiter`` (a rate_limiter.TokenBucket) is drawn from before every attempt.
+        """
+        client = self.client
+        attempt = 0
+        while True:
+            if limiter is not None:
+                waited = limiter.acquire()
+                if waited:
+                    print(f"  {upstream} rate limit: waited {waited:.2f}s")
+            try:
+                with self.bulkhead(upstream), metrics.timer(f"{upstream}.call"):
+                    return fn(client)
+            except BulkheadFull:
+                raise
+            except Exception as e:
+                delay = retry_delay(e, attempt) if idempotent and attempt < VOICE_MAX_RETRIES else None
+                if delay is None:
+                    metrics.incr(f"{upstream}.errors")
+                    raise
+                attempt += 1
+                metrics.incr(f"{upstream}.retries")
+                print(f"  ↻ {upstream} retry {attempt}/{VOICE_MAX_RETRIES} in {delay:.2f}s: {type(e).__name__}")
+                time.sleep(delay)
+
+
+_voice_gateway: Optional[VoiceGateway] = None
+_voice_gateway_lock = threading.Lock()
+
+
+def get_voice_gateway() -> VoiceGateway:
+    global _voice_gateway
+    with _voice_gateway_lock:
+        if _voice_gateway is None:
+            _voice_gateway = VoiceGateway()
+        return _voice_gateway